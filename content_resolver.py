@@ -8,6 +8,7 @@ from content_resolver.page_generation import generate_pages
 from content_resolver.query import Query
 from content_resolver.utils import load_data, log, datetime_now_string, dump_data
 from content_resolver.config_manager import ConfigManager
+from content_resolver.exceptions import SettingsError
 
 
 
@@ -65,6 +66,21 @@ def main():
 
 
 
+    # Caches made before the configs hash was saved are trusted as they are,
+    # but a cache made from different configs would give wrong results
+    if settings["use_cache"]:
+        configs_hash = config_manager.get_configs_hash()
+
+        try:
+            cached_configs_hash = load_data(settings["cache_configs_hash_path"])["configs_hash"]
+        except FileNotFoundError:
+            cached_configs_hash = configs_hash
+
+        # Falling back to a full analysis would take hours, which is exactly
+        # what --use-cache is meant to avoid, so just stop
+        if cached_configs_hash != configs_hash:
+            raise SettingsError("The configs have changed since the cache was made. Rebuild the cache by running with --dev-buildroot first.")
+
     if settings["use_cache"]:
         configs = load_data("cache_configs.json")
         data = load_data("cache_data.json")
@@ -76,6 +92,7 @@ def main():
         if settings["dev_buildroot"]:
             dump_data("cache_configs.json", configs)
             dump_data("cache_data.json", data)
+            dump_data(settings["cache_configs_hash_path"], {"configs_hash": config_manager.configs_hash})
 
 
 
@@ -89,9 +106,9 @@ def main():
 
     query = Query(data, configs, settings)
 
-    generate_pages(query)
-    generate_data_files(query)
-    generate_historic_data(query)
+    # The data files and the historic data don't depend on the pages,
+    # so they get generated in separate processes alongside the page groups.
+    generate_pages(query, other_generators=[generate_data_files, generate_historic_data])
 
 
     # -------------------------------------------------
@@ -1,6 +1,6 @@
-import tempfile, os, json, datetime, dnf, urllib.request, sys, koji
+import tempfile, os, json, datetime, dnf, urllib.request, sys, koji, subprocess, fcntl
 
-import multiprocessing, asyncio
+import multiprocessing, multiprocessing.connection, asyncio, copy
 from content_resolver.utils import dump_data, load_data, log, err_log, pkg_id_to_name, size, workload_id_to_conf_id, url_to_id
 from content_resolver.exceptions import RepoDownloadError, BuildGroupAnalysisError, KojiRootLogError, AnalysisError
 
@@ -194,6 +194,10 @@ class Analyzer():
             # Releasever
             base.conf.substitutions['releasever'] = repo["source"]["releasever"]
 
+            # Download more things at once, and from the fastest mirror
+            base.conf.max_parallel_downloads = 10
+            base.conf.fastestmirror = True
+
             for repo_name, repo_data in repo["source"]["repos"].items():
                 if repo_data["limit_arches"]:
                     if arch not in repo_data["limit_arches"]:
@@ -313,7 +317,7 @@ class Analyzer():
                 for reponame in pkg["all_reponames"]:
                     all_repo_priorities.add(repo_priorities[reponame])
                 
-                highest_repo_priority = sorted(list(all_repo_priorities))[0]
+                highest_repo_priority = sorted(all_repo_priorities)[0]
 
                 for reponame in pkg["all_reponames"]:
                     if repo_priorities[reponame] == highest_repo_priority:
@@ -397,9 +401,9 @@ class Analyzer():
             #    suggested_by.add(dep_pkg_id)
             
             relations[pkg_id] = {}
-            relations[pkg_id]["required_by"] = sorted(list(required_by))
-            relations[pkg_id]["recommended_by"] = sorted(list(recommended_by))
-            #relations[pkg_id]["suggested_by"] = sorted(list(suggested_by))
+            relations[pkg_id]["required_by"] = sorted(required_by)
+            relations[pkg_id]["recommended_by"] = sorted(recommended_by)
+            #relations[pkg_id]["suggested_by"] = sorted(suggested_by)
             relations[pkg_id]["suggested_by"] = []
             relations[pkg_id]["source_name"] = pkg.source_name
             relations[pkg_id]["reponame"] = pkg.reponame
@@ -433,24 +437,77 @@ class Analyzer():
         # So, this workaround runs it in a subprocess that should have its resources
         # freed when done!
 
-        queue_result = multiprocessing.Queue()
-        process = multiprocessing.Process(target=self._analyze_env_process, args=(queue_result, env_conf, repo, arch))
+        process, result_receiver = self._start_env_analysis(env_conf, repo, arch)
+        env = self._finish_env_analysis(process, result_receiver)
+
+        return env
+
+
+    def _start_env_analysis(self, env_conf, repo, arch):
+
+        # Starts the subprocess, but doesn't wait for it to finish,
+        # so multiple envs can be analyzed at the same time.
+        # The result comes back through a pipe, which (unlike a queue)
+        # can be waited on together with the process itself.
+        result_receiver, result_sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=self._analyze_env_process, args=(result_sender, env_conf, repo, arch))
         process.start()
-        process.join()
 
-        # This basically means there was an exception in the processing and the process crashed
-        if queue_result.empty():
+        # Only the subprocess sends anything
+        result_sender.close()
+
+        return process, result_receiver
+
+
+    def _finish_env_analysis(self, process, result_receiver):
+
+        # The result needs to be taken out of the pipe before joining the process,
+        # otherwise a big result would keep the process from ever finishing.
+        multiprocessing.connection.wait([result_receiver, process.sentinel])
+
+        try:
+            env = result_receiver.recv()
+        except EOFError:
+            # This basically means there was an exception in the processing and the process crashed
             raise AnalysisError
-        
-        env = queue_result.get()
+        finally:
+            result_receiver.close()
+            process.join()
 
         return env
 
 
-    def _analyze_env_process(self, queue_result, env_conf, repo, arch):
+    def _finish_any_env_analysis(self, running_envs):
+
+        # Waits for whichever of the running envs finishes first,
+        # so a single slow env doesn't keep new ones from starting.
+        ready = multiprocessing.connection.wait(
+            [result_receiver for env_id, process, result_receiver in running_envs] +
+            [process.sentinel for env_id, process, result_receiver in running_envs]
+        )
+
+        for index, (env_id, process, result_receiver) in enumerate(running_envs):
+            if result_receiver in ready or process.sentinel in ready:
+                running_envs.pop(index)
+                return env_id, self._finish_env_analysis(process, result_receiver)
+
+
+    def _stop_env_analyses(self, running_envs):
+
+        # When something goes wrong, nothing should be left running
+        # in the background, still writing into the installroots and the cache.
+        for env_id, process, result_receiver in running_envs:
+            process.terminate()
+            process.join()
+            result_receiver.close()
+
+        running_envs.clear()
+
+
+    def _analyze_env_process(self, result_sender, env_conf, repo, arch):
 
         env = self._analyze_env(env_conf, repo, arch)
-        queue_result.put(env)
+        result_sender.send(env)
 
 
     def _analyze_env(self, env_conf, repo, arch):
@@ -496,6 +553,21 @@ class Analyzer():
             # Releasever
             base.conf.substitutions['releasever'] = repo["source"]["releasever"]
 
+            # Download more things at once, and from the fastest mirror
+            base.conf.max_parallel_downloads = 10
+            base.conf.fastestmirror = True
+
+            # The repodata in this cachedir have already been downloaded
+            # by _analyze_pkgs during this run, so don't check them again
+            base.conf.metadata_expire = -1
+
+            # Keep the downloaded packages in the cachedir after the transaction,
+            # so other environments from the same repo and arch can reuse them.
+            # But only in the private temporary cachedir. One given by
+            # --dnf-cache-dir might be a tmpfs (like in refresh.sh), and all
+            # the packages of a whole run would fill it up.
+            base.conf.keepcache = not self.settings["dnf_cache_dir_override"]
+
             # Additional DNF Settings
             base.conf.tsflags.append('justdb')
             base.conf.tsflags.append('noscripts')
@@ -582,7 +654,12 @@ class Analyzer():
             # So let's do that to make it happy.
             log("  Downloading packages...")
             try:
-                base.download_packages(base.transaction.install_set)
+                # Envs from the same repo and arch run at the same time and share
+                # the cachedir, so they take turns to not download the same files
+                # over each other. Whatever the previous one got is reused.
+                with open(os.path.join(base.conf.cachedir, "download.lock"), "w") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                    base.download_packages(base.transaction.install_set)
             except dnf.exceptions.DownloadError as err:
                 err_log("Failed to analyze environment '{env_conf}' from '{repo}' {arch}:".format(
                         env_conf=env_conf["id"],
@@ -633,34 +710,107 @@ class Analyzer():
     def _analyze_envs(self):
         envs = {}
 
-        # Look at all env configs...
-        for env_conf_id, env_conf in self.configs["envs"].items():
-            # For each of those, look at all repos it lists...
-            for repo_id in env_conf["repositories"]:
-                # And for each of the repo, look at all arches it supports.
-                repo = self.configs["repos"][repo_id]
-                for arch in repo["source"]["architectures"]:
-                    # Now it has
-                    #    all env confs *
-                    #    repos each config lists *
-                    #    archeas each repo supports
-                    # Analyze all of that!
-                    log("Analyzing {env_name} ({env_id}) from {repo_name} ({repo}) {arch}...".format(
-                        env_name=env_conf["name"],
-                        env_id=env_conf_id,
-                        repo_name=repo["name"],
-                        repo=repo_id,
-                        arch=arch
-                    ))
+        # Envs don't depend on each other, so they get analyzed
+        # in subprocesses, up to max_subprocesses at the same time.
+        running_envs = []
 
-                    env_id = "{env_conf_id}:{repo_id}:{arch}".format(
-                        env_conf_id=env_conf_id,
-                        repo_id=repo_id,
-                        arch=arch
-                    )
-                    envs[env_id] = self._analyze_env(env_conf, repo, arch)
-                    
-        self.data["envs"] = envs
+        # Envs that install exactly the same things from the same repo
+        # on the same arch end up exactly the same. So only the first
+        # one gets analyzed, and the others are copied from it.
+        env_ids_by_content = {}
+        duplicate_envs = []
+
+        # Envs finish in any order, but the results are kept in the config order
+        env_ids = []
+
+        try:
+            # Look at all env configs...
+            for env_conf_id, env_conf in self.configs["envs"].items():
+                # For each of those, look at all repos it lists...
+                for repo_id in env_conf["repositories"]:
+                    # And for each of the repo, look at all arches it supports.
+                    repo = self.configs["repos"][repo_id]
+                    for arch in repo["source"]["architectures"]:
+                        # Now it has
+                        #    all env confs *
+                        #    repos each config lists *
+                        #    archeas each repo supports
+                        # Analyze all of that!
+                        log("Analyzing {env_name} ({env_id}) from {repo_name} ({repo}) {arch}...".format(
+                            env_name=env_conf["name"],
+                            env_id=env_conf_id,
+                            repo_name=repo["name"],
+                            repo=repo_id,
+                            arch=arch
+                        ))
+
+                        env_id = "{env_conf_id}:{repo_id}:{arch}".format(
+                            env_conf_id=env_conf_id,
+                            repo_id=repo_id,
+                            arch=arch
+                        )
+                        env_ids.append(env_id)
+
+                        env_content = (
+                            repo_id,
+                            arch,
+                            tuple(env_conf["packages"]),
+                            tuple(env_conf["groups"]),
+                            tuple(env_conf["arch_packages"][arch]),
+                            tuple(env_conf["options"])
+                        )
+
+                        if env_content in env_ids_by_content:
+                            log("  Same as {}, copying it when done.".format(env_ids_by_content[env_content]))
+                            duplicate_envs.append((env_id, env_ids_by_content[env_content], env_conf_id, repo_id, arch))
+                            continue
+
+                        env_ids_by_content[env_content] = env_id
+
+                        # Max processes
+                        if len(running_envs) >= self.settings["max_subprocesses"]:
+                            finished_env_id, finished_env = self._finish_any_env_analysis(running_envs)
+                            envs[finished_env_id] = finished_env
+
+                        process, result_receiver = self._start_env_analysis(env_conf, repo, arch)
+                        running_envs.append((env_id, process, result_receiver))
+
+            # Wait for the rest
+            while running_envs:
+                finished_env_id, finished_env = self._finish_any_env_analysis(running_envs)
+                envs[finished_env_id] = finished_env
+
+        finally:
+            self._stop_env_analyses(running_envs)
+
+        # And copy the results of the duplicates, including
+        # the installroot which the workloads are analyzed in
+        for env_id, original_env_id, env_conf_id, repo_id, arch in duplicate_envs:
+            original_env = envs[original_env_id]
+
+            # A full copy, so the duplicates don't share any lists or dicts.
+            # That's only one env's results per duplicate (its pkg_relations
+            # hold nested lists too, so a shallow copy wouldn't do), and it's
+            # nothing next to copying the installroot below.
+            env = copy.deepcopy(original_env)
+            env["env_conf_id"] = env_conf_id
+            envs[env_id] = env
+
+            original_root_name = "dnf_env_installroot-{env_conf}-{repo}-{arch}".format(
+                env_conf=original_env["env_conf_id"],
+                repo=repo_id,
+                arch=arch
+            )
+            root_name = "dnf_env_installroot-{env_conf}-{repo}-{arch}".format(
+                env_conf=env_conf_id,
+                repo=repo_id,
+                arch=arch
+            )
+            original_installroot = os.path.join(self.tmp_installroots, original_root_name)
+            if os.path.exists(original_installroot):
+                subprocess.run(["cp", "-a", "--reflink=auto", original_installroot, os.path.join(self.tmp_installroots, root_name)], check=True)
+
+        self.data["envs"] = {env_id: envs[env_id] for env_id in env_ids}
 
 
     def _return_failed_workload_env_err(self, workload_conf, env_conf, repo, arch):
@@ -754,6 +904,14 @@ class Analyzer():
             # Releasever
             base.conf.substitutions['releasever'] = repo["source"]["releasever"]
 
+            # Download more things at once, and from the fastest mirror
+            base.conf.max_parallel_downloads = 10
+            base.conf.fastestmirror = True
+
+            # The repodata in this cachedir have already been downloaded
+            # by _analyze_pkgs during this run, so don't check them again
+            base.conf.metadata_expire = -1
+
             # Environment config
             if "include-weak-deps" not in workload_conf["options"]:
                 base.conf.install_weak_deps = False
@@ -800,6 +958,10 @@ class Analyzer():
             
             # 37 %
 
+            # Missing packages are either errors or just warnings,
+            # decided once here rather than for every missing package
+            strict = "strict" in workload_conf["options"]
+
             # Packages
             #log("  Adding packages...")
             for pkg in workload_conf["packages"]:
@@ -809,7 +971,7 @@ class Analyzer():
                     if pkg in self.settings["weird_packages_that_can_not_be_installed"]:
                         continue
                     else:
-                        if "strict" in workload_conf["options"]:
+                        if strict:
                             workload["errors"]["non_existing_pkgs"].append(pkg)
                         else:
                             workload["warnings"]["non_existing_pkgs"].append(pkg)
@@ -861,7 +1023,7 @@ class Analyzer():
                     try:
                         base.install(pkg)
                     except dnf.exceptions.MarkingError:
-                        if "strict" in workload_conf["options"]:
+                        if strict:
                             workload["errors"]["non_existing_placeholder_deps"].append(pkg)
                         else:
                             workload["warnings"]["non_existing_placeholder_deps"].append(pkg)
@@ -872,7 +1034,7 @@ class Analyzer():
                 try:
                     base.install(pkg)
                 except dnf.exceptions.MarkingError:
-                    if "strict" in workload_conf["options"]:
+                    if strict:
                         workload["errors"]["non_existing_pkgs"].append(pkg)
                     else:
                         workload["warnings"]["non_existing_pkgs"].append(pkg)
@@ -1914,46 +2076,82 @@ class Analyzer():
         log("Analyzing build groups...")
         log("")
 
-        # Need to analyse build groups for all repo_ids
-        # and arches of buildroot["srpms"]
-        for repo_id in self.data["buildroot"]["srpms"]:
-            self.data["buildroot"]["build_groups"][repo_id] = {}
+        # Build groups don't depend on each other, so they get analyzed
+        # in subprocesses, up to max_subprocesses at the same time.
+        running_build_groups = []
+        build_group_keys = []
+        build_group_envs = {}
 
-            for arch in self.data["buildroot"]["srpms"][repo_id]:
+        try:
+            # Need to analyse build groups for all repo_ids
+            # and arches of buildroot["srpms"]
+            for repo_id in self.data["buildroot"]["srpms"]:
+                self.data["buildroot"]["build_groups"][repo_id] = {}
 
-                generated_id = "CR-buildroot-base-env-{repo_id}-{arch}".format(
-                    repo_id=repo_id,
-                    arch=arch
-                )
+                for arch in self.data["buildroot"]["srpms"][repo_id]:
 
-                # Using the _analyze_env function! 
-                # So I need to reconstruct a fake env_conf
-                fake_env_conf = {}
-                fake_env_conf["id"] = generated_id
-                fake_env_conf["options"] = []
-                if self.configs["repos"][repo_id]["source"]["base_buildroot_override"]:
-                    fake_env_conf["packages"] = self.configs["repos"][repo_id]["source"]["base_buildroot_override"]
-                    fake_env_conf["groups"] = []
-                else:
-                    fake_env_conf["packages"] = []
-                    fake_env_conf["groups"] = ["build"]
-                fake_env_conf["arch_packages"] = {}
-                fake_env_conf["arch_packages"][arch] = []
+                    generated_id = "CR-buildroot-base-env-{repo_id}-{arch}".format(
+                        repo_id=repo_id,
+                        arch=arch
+                    )
 
-                log("Resolving build group: {repo_id} {arch}".format(
-                    repo_id=repo_id,
-                    arch=arch
-                ))
-                repo = self.configs["repos"][repo_id]
-                fake_env = self._analyze_env(fake_env_conf, repo, arch)
+                    # Using the _analyze_env function! 
+                    # So I need to reconstruct a fake env_conf
+                    fake_env_conf = {}
+                    fake_env_conf["id"] = generated_id
+                    fake_env_conf["options"] = []
+                    if self.configs["repos"][repo_id]["source"]["base_buildroot_override"]:
+                        fake_env_conf["packages"] = self.configs["repos"][repo_id]["source"]["base_buildroot_override"]
+                        fake_env_conf["groups"] = []
+                    else:
+                        fake_env_conf["packages"] = []
+                        fake_env_conf["groups"] = ["build"]
+                    fake_env_conf["arch_packages"] = {}
+                    fake_env_conf["arch_packages"][arch] = []
+
+                    log("Resolving build group: {repo_id} {arch}".format(
+                        repo_id=repo_id,
+                        arch=arch
+                    ))
+                    repo = self.configs["repos"][repo_id]
+
+                    # Max processes
+                    if len(running_build_groups) >= self.settings["max_subprocesses"]:
+                        finished_key, finished_env = self._finish_any_env_analysis(running_build_groups)
+
+                        # If this fails, the buildroot can't be resolved.
+                        # Fail the entire content resolver build!
+                        if not finished_env["succeeded"]:
+                            raise BuildGroupAnalysisError
+
+                        build_group_envs[finished_key] = finished_env
+
+                    build_group_key = (repo_id, arch, generated_id)
+                    build_group_keys.append(build_group_key)
+
+                    process, result_receiver = self._start_env_analysis(fake_env_conf, repo, arch)
+                    running_build_groups.append((build_group_key, process, result_receiver))
+
+            # Wait for the rest
+            while running_build_groups:
+                finished_key, finished_env = self._finish_any_env_analysis(running_build_groups)
 
                 # If this fails, the buildroot can't be resolved.
                 # Fail the entire content resolver build!
-                if not fake_env["succeeded"]:
+                if not finished_env["succeeded"]:
                     raise BuildGroupAnalysisError
 
-                self.data["buildroot"]["build_groups"][repo_id][arch] = fake_env
-                self.data["buildroot"]["build_groups"][repo_id][arch]["generated_id"] = generated_id
+                build_group_envs[finished_key] = finished_env
+
+        finally:
+            self._stop_env_analyses(running_build_groups)
+
+        for build_group_key in build_group_keys:
+            repo_id, arch, generated_id = build_group_key
+            fake_env = build_group_envs[build_group_key]
+
+            self.data["buildroot"]["build_groups"][repo_id][arch] = fake_env
+            self.data["buildroot"]["build_groups"][repo_id][arch]["generated_id"] = generated_id
 
         log("")
         log("  DONE!")
@@ -1,11 +1,24 @@
 import os
+import orjson
 import yaml
+import hashlib
 import argparse
 
-from content_resolver.utils import err_log, log
+from content_resolver.utils import dump_data, err_log, load_data, log
 
 from content_resolver.exceptions import SettingsError, ConfigError
 
+# The C-based loader is a lot faster, but it's only there when PyYAML
+# has been built with libyaml. Both are just as safe as yaml.safe_load.
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Bump this whenever the way configs get loaded changes,
+# so nothing stale gets picked up from the configs cache.
+CONFIGS_CACHE_VERSION = 2
+
 class ConfigManager:
     def __init__(self, config_file=None):
         if config_file is not None:
@@ -13,6 +26,9 @@ class ConfigManager:
         else:
             self.settings = self.load_settings()
 
+        # Set by get_configs, from the very files it has loaded
+        self.configs_hash = None
+
 
     def load_settings(self):
         settings = {}
@@ -33,6 +49,10 @@ class ConfigManager:
 
         settings["root_log_deps_cache_path"] = "cache_root_log_deps.json"
 
+        settings["configs_cache_path"] = "cache_configs_yaml.json"
+
+        settings["cache_configs_hash_path"] = "cache_configs_hash.json"
+
         settings["max_subprocesses"] = 10
 
         settings["allowed_arches"] = ["aarch64", "ppc64le", "s390x", "x86_64"]
@@ -131,9 +151,8 @@ class ConfigManager:
         config["source"]["composeinfo"] = document["data"]["source"].get("composeinfo", None)
 
         config["source"]["base_buildroot_override"] = []
-        if "base_buildroot_override" in document["data"]["source"]:
-            for pkg_name in document["data"]["source"]["base_buildroot_override"]:
-                config["source"]["base_buildroot_override"].append(str(pkg_name))
+        for pkg_name in document["data"]["source"].get("base_buildroot_override", []):
+            config["source"]["base_buildroot_override"].append(str(pkg_name))
 
         return config
 
@@ -182,34 +201,32 @@ class ConfigManager:
         config["arch_packages"] = {}
         for arch in settings["allowed_arches"]:
             config["arch_packages"][arch] = []
-        if "arch_packages" in document["data"]:
-            for arch, pkgs in document["data"]["arch_packages"].items():
-                if arch not in settings["allowed_arches"]:
-                    log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
-                        file=document_id,
-                        arch=arch
-                    ))
-                    continue
-                for pkg_raw in pkgs:
-                    pkg = str(pkg_raw)
-                    config["arch_packages"][arch].append(pkg)
+        for arch, pkgs in document["data"].get("arch_packages", {}).items():
+            if arch not in settings["allowed_arches"]:
+                log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
+                    file=document_id,
+                    arch=arch
+                ))
+                continue
+            for pkg_raw in pkgs:
+                pkg = str(pkg_raw)
+                config["arch_packages"][arch].append(pkg)
         
         # Extra installation options.
         # The following are now supported:
         # - "include-docs" - include documentation packages
         # - "include-weak-deps" - automatically pull in "recommends" weak dependencies
         config["options"] = []
-        if "options" in document["data"]:
-            if "include-docs" in document["data"]["options"]:
-                config["options"].append("include-docs")
-            if "include-weak-deps" in document["data"]["options"]:
-                config["options"].append("include-weak-deps")
+        options = document["data"].get("options", [])
+        if "include-docs" in options:
+            config["options"].append("include-docs")
+        if "include-weak-deps" in options:
+            config["options"].append("include-weak-deps")
         
         # Comps groups
         config["groups"] = []
-        if "groups" in document["data"]:
-            for module in document["data"]["groups"]:
-                config["groups"].append(module)
+        for module in document["data"].get("groups", []):
+            config["groups"].append(module)
 
         return config
 
@@ -277,94 +294,92 @@ class ConfigManager:
         config["arch_packages"] = {}
         for arch in settings["allowed_arches"]:
             config["arch_packages"][arch] = []
-        if "arch_packages" in document["data"]:
-            for arch, pkgs in document["data"]["arch_packages"].items():
-                if arch not in settings["allowed_arches"]:
-                    log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
-                        file=document_id,
-                        arch=arch
-                    ))
-                    continue
-                # This workaround allows for "arch_packages/ARCH" to be left empty in the config
-                try:
-                    for pkg_raw in pkgs:
-                        pkg = str(pkg_raw)
-                        config["arch_packages"][arch].append(pkg)
-                except TypeError:
-                    log("  Warning: {file} has an empty 'arch_packages/{arch}' field defined which is invalid. Moving on...".format(
-                        file=document_id,
-                        arch=arch
-                    ))
+        for arch, pkgs in document["data"].get("arch_packages", {}).items():
+            if arch not in settings["allowed_arches"]:
+                log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
+                    file=document_id,
+                    arch=arch
+                ))
+                continue
+            # This workaround allows for "arch_packages/ARCH" to be left empty in the config
+            try:
+                for pkg_raw in pkgs:
+                    pkg = str(pkg_raw)
+                    config["arch_packages"][arch].append(pkg)
+            except TypeError:
+                log("  Warning: {file} has an empty 'arch_packages/{arch}' field defined which is invalid. Moving on...".format(
+                    file=document_id,
+                    arch=arch
+                ))
         
         # Extra installation options.
         # The following are now supported:
         # - "include-docs" - include documentation packages
         # - "include-weak-deps" - automatically pull in "recommends" weak dependencies
         config["options"] = []
-        if "options" in document["data"]:
-            if "include-docs" in document["data"]["options"]:
-                config["options"].append("include-docs")
-            if "include-weak-deps" in document["data"]["options"]:
-                config["options"].append("include-weak-deps")
-            if "strict" in document["data"]["options"]:
-                config["options"].append("strict")
+        options = document["data"].get("options", [])
+        if "include-docs" in options:
+            config["options"].append("include-docs")
+        if "include-weak-deps" in options:
+            config["options"].append("include-weak-deps")
+        if "strict" in options:
+            config["options"].append("strict")
         
         
         # Comps groups
         config["groups"] = []
-        if "groups" in document["data"]:
-            for module in document["data"]["groups"]:
-                config["groups"].append(module)
+        for module in document["data"].get("groups", []):
+            config["groups"].append(module)
 
         # Package placeholders
         # Add packages to the workload that don't exist (yet) in the repositories.
         config["package_placeholders"] = {}
         config["package_placeholders"]["pkgs"] = {}
         config["package_placeholders"]["srpms"] = {}
-        if "package_placeholders" in document["data"]:
-            if isinstance(document["data"]["package_placeholders"], list):
-                for srpm in document["data"]["package_placeholders"]:
-                    srpm_name = srpm["srpm_name"]
-                    if not srpm_name:
-                        continue
+        package_placeholders = document["data"].get("package_placeholders", None)
+        if isinstance(package_placeholders, list):
+            for srpm in package_placeholders:
+                srpm_name = srpm["srpm_name"]
+                if not srpm_name:
+                    continue
 
-                    build_dependencies = srpm.get("build_dependencies", [])
-                    limit_arches = srpm.get("limit_arches", [])
-                    rpms = srpm.get("rpms", [])
+                build_dependencies = srpm.get("build_dependencies", [])
+                limit_arches = srpm.get("limit_arches", [])
+                rpms = srpm.get("rpms", [])
 
-                    all_rpm_arches = set()
+                all_rpm_arches = set()
 
-                    config["package_placeholders"]["srpms"][srpm_name] = {}
-                    config["package_placeholders"]["srpms"][srpm_name]["name"] = srpm_name
-                    config["package_placeholders"]["srpms"][srpm_name]["buildrequires"] = build_dependencies
-                    config["package_placeholders"]["srpms"][srpm_name]["limit_arches"] = limit_arches
+                config["package_placeholders"]["srpms"][srpm_name] = {}
+                config["package_placeholders"]["srpms"][srpm_name]["name"] = srpm_name
+                config["package_placeholders"]["srpms"][srpm_name]["buildrequires"] = build_dependencies
+                config["package_placeholders"]["srpms"][srpm_name]["limit_arches"] = limit_arches
 
-                    for rpm in rpms:
-                        rpm_name = rpm.get("rpm_name", None)
-                        if not rpm_name:
-                            continue
+                for rpm in rpms:
+                    rpm_name = rpm.get("rpm_name", None)
+                    if not rpm_name:
+                        continue
                         
-                        description = rpm.get("description", "Description not provided.")
-                        dependencies = rpm.get("dependencies", [])
-                        rpm_limit_arches = rpm.get("limit_arches", [])
+                    description = rpm.get("description", "Description not provided.")
+                    dependencies = rpm.get("dependencies", [])
+                    rpm_limit_arches = rpm.get("limit_arches", [])
 
-                        if limit_arches and rpm_limit_arches:
-                            rpm_limit_arches = list(set(limit_arches) & set(rpm_limit_arches))
+                    if limit_arches and rpm_limit_arches:
+                        rpm_limit_arches = list(set(limit_arches) & set(rpm_limit_arches))
                         
-                        elif limit_arches and not rpm_limit_arches:
-                            rpm_limit_arches = limit_arches
+                    elif limit_arches and not rpm_limit_arches:
+                        rpm_limit_arches = limit_arches
                         
-                        all_rpm_arches.update(rpm_limit_arches)
-
-                        config["package_placeholders"]["pkgs"][rpm_name] = {}
-                        config["package_placeholders"]["pkgs"][rpm_name]["name"] = rpm_name
-                        config["package_placeholders"]["pkgs"][rpm_name]["description"] = description
-                        config["package_placeholders"]["pkgs"][rpm_name]["requires"] = dependencies
-                        config["package_placeholders"]["pkgs"][rpm_name]["limit_arches"] = rpm_limit_arches
-                        config["package_placeholders"]["pkgs"][rpm_name]["srpm"] = srpm_name
+                    all_rpm_arches.update(rpm_limit_arches)
+
+                    config["package_placeholders"]["pkgs"][rpm_name] = {}
+                    config["package_placeholders"]["pkgs"][rpm_name]["name"] = rpm_name
+                    config["package_placeholders"]["pkgs"][rpm_name]["description"] = description
+                    config["package_placeholders"]["pkgs"][rpm_name]["requires"] = dependencies
+                    config["package_placeholders"]["pkgs"][rpm_name]["limit_arches"] = rpm_limit_arches
+                    config["package_placeholders"]["pkgs"][rpm_name]["srpm"] = srpm_name
                     
-                    if not limit_arches and all_rpm_arches:
-                        config["package_placeholders"]["srpms"][srpm_name]["limit_arches"] = list(all_rpm_arches)
+                if not limit_arches and all_rpm_arches:
+                    config["package_placeholders"]["srpms"][srpm_name]["limit_arches"] = list(all_rpm_arches)
 
 
 
@@ -430,45 +445,41 @@ class ConfigManager:
 
         # Buildroot strategy
         config["buildroot_strategy"] = "none"
-        if "buildroot_strategy" in document["data"]:
-            if str(document["data"]["buildroot_strategy"]) in ["none", "root_logs"]:
-                config["buildroot_strategy"] = str(document["data"]["buildroot_strategy"])
+        buildroot_strategy = str(document["data"].get("buildroot_strategy", "none"))
+        if buildroot_strategy in ["none", "root_logs"]:
+            config["buildroot_strategy"] = buildroot_strategy
         
         # Limit this view only to the following architectures
         config["architectures"] = []
-        if "architectures" in document["data"]:
-            for arch in document["data"]["architectures"]:
-                config["architectures"].append(str(arch))
+        for arch in document["data"].get("architectures", []):
+            config["architectures"].append(str(arch))
         if not len(config["architectures"]):
             config["architectures"] = settings["allowed_arches"]
         
         # Packages to be flagged as unwanted
         config["unwanted_packages"] = []
-        if "unwanted_packages" in document["data"]:
-            for pkg in document["data"]["unwanted_packages"]:
-                config["unwanted_packages"].append(str(pkg))
+        for pkg in document["data"].get("unwanted_packages", []):
+            config["unwanted_packages"].append(str(pkg))
 
         # Packages to be flagged as unwanted  on specific architectures
         config["unwanted_arch_packages"] = {}
         for arch in settings["allowed_arches"]:
             config["unwanted_arch_packages"][arch] = []
-        if "unwanted_arch_packages" in document["data"]:
-            for arch, pkgs in document["data"]["unwanted_arch_packages"].items():
-                if arch not in settings["allowed_arches"]:
-                    log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
-                        file=document_id,
-                        arch=arch
-                    ))
-                    continue
-                for pkg_raw in pkgs:
-                    pkg = str(pkg_raw)
-                    config["unwanted_arch_packages"][arch].append(pkg)
+        for arch, pkgs in document["data"].get("unwanted_arch_packages", {}).items():
+            if arch not in settings["allowed_arches"]:
+                log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
+                    file=document_id,
+                    arch=arch
+                ))
+                continue
+            for pkg_raw in pkgs:
+                pkg = str(pkg_raw)
+                config["unwanted_arch_packages"][arch].append(pkg)
         
         # SRPMs (components) to be flagged as unwanted
         config["unwanted_source_packages"] = []
-        if "unwanted_source_packages" in document["data"]:
-            for pkg in document["data"]["unwanted_source_packages"]:
-                config["unwanted_source_packages"].append(str(pkg))
+        for pkg in document["data"].get("unwanted_source_packages", []):
+            config["unwanted_source_packages"].append(str(pkg))
 
         return config
 
@@ -508,31 +519,28 @@ class ConfigManager:
 
         # Packages to be flagged as unwanted
         config["unwanted_packages"] = []
-        if "unwanted_packages" in document["data"]:
-            for pkg in document["data"]["unwanted_packages"]:
-                config["unwanted_packages"].append(str(pkg))
+        for pkg in document["data"].get("unwanted_packages", []):
+            config["unwanted_packages"].append(str(pkg))
 
         # Packages to be flagged as unwanted  on specific architectures
         config["unwanted_arch_packages"] = {}
         for arch in settings["allowed_arches"]:
             config["unwanted_arch_packages"][arch] = []
-        if "unwanted_arch_packages" in document["data"]:
-            for arch, pkgs in document["data"]["unwanted_arch_packages"].items():
-                if arch not in settings["allowed_arches"]:
-                    log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
-                        file=document_id,
-                        arch=arch
-                    ))
-                    continue
-                for pkg_raw in pkgs:
-                    pkg = str(pkg_raw)
-                    config["unwanted_arch_packages"][arch].append(pkg)
+        for arch, pkgs in document["data"].get("unwanted_arch_packages", {}).items():
+            if arch not in settings["allowed_arches"]:
+                log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
+                    file=document_id,
+                    arch=arch
+                ))
+                continue
+            for pkg_raw in pkgs:
+                pkg = str(pkg_raw)
+                config["unwanted_arch_packages"][arch].append(pkg)
         
         # SRPMs (components) to be flagged as unwanted
         config["unwanted_source_packages"] = []
-        if "unwanted_source_packages" in document["data"]:
-            for pkg in document["data"]["unwanted_source_packages"]:
-                config["unwanted_source_packages"].append(str(pkg))
+        for pkg in document["data"].get("unwanted_source_packages", []):
+            config["unwanted_source_packages"].append(str(pkg))
 
 
 
@@ -584,47 +592,43 @@ class ConfigManager:
 
         # Packages to be flagged as unwanted
         config["unwanted_packages"] = []
-        if "unwanted_packages" in document["data"]:
-            for pkg in document["data"]["unwanted_packages"]:
-                config["unwanted_packages"].append(str(pkg))
+        for pkg in document["data"].get("unwanted_packages", []):
+            config["unwanted_packages"].append(str(pkg))
 
         # Packages to be flagged as unwanted  on specific architectures
         config["unwanted_arch_packages"] = {}
         for arch in settings["allowed_arches"]:
             config["unwanted_arch_packages"][arch] = []
-        if "unwanted_arch_packages" in document["data"]:
-            for arch, pkgs in document["data"]["unwanted_arch_packages"].items():
-                if arch not in settings["allowed_arches"]:
-                    log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
-                        file=document_id,
-                        arch=arch
-                    ))
-                    continue
-                for pkg_raw in pkgs:
-                    pkg = str(pkg_raw)
-                    config["unwanted_arch_packages"][arch].append(pkg)
+        for arch, pkgs in document["data"].get("unwanted_arch_packages", {}).items():
+            if arch not in settings["allowed_arches"]:
+                log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
+                    file=document_id,
+                    arch=arch
+                ))
+                continue
+            for pkg_raw in pkgs:
+                pkg = str(pkg_raw)
+                config["unwanted_arch_packages"][arch].append(pkg)
         
         # SRPMs (components) to be flagged as unwanted
         config["unwanted_source_packages"] = []
-        if "unwanted_source_packages" in document["data"]:
-            for pkg in document["data"]["unwanted_source_packages"]:
-                config["unwanted_source_packages"].append(str(pkg))
+        for pkg in document["data"].get("unwanted_source_packages", []):
+            config["unwanted_source_packages"].append(str(pkg))
 
         # SRPMs (components) to be flagged as unwanted on specific architectures
         config["unwanted_arch_source_packages"] = {}
         for arch in settings["allowed_arches"]:
             config["unwanted_arch_source_packages"][arch] = []
-        if "unwanted_arch_source_packages" in document["data"]:
-            for arch, pkgs in document["data"]["unwanted_arch_source_packages"].items():
-                if arch not in settings["allowed_arches"]:
-                    log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
-                        file=document_id,
-                        arch=arch
-                    ))
-                    continue
-                for pkg_raw in pkgs:
-                    pkg = str(pkg_raw)
-                    config["unwanted_arch_source_packages"][arch].append(pkg)
+        for arch, pkgs in document["data"].get("unwanted_arch_source_packages", {}).items():
+            if arch not in settings["allowed_arches"]:
+                log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
+                    file=document_id,
+                    arch=arch
+                ))
+                continue
+            for pkg_raw in pkgs:
+                pkg = str(pkg_raw)
+                config["unwanted_arch_source_packages"][arch].append(pkg)
         return config
 
 
@@ -648,46 +652,43 @@ class ConfigManager:
         config["base_buildroot"] = {}
         for arch in settings["allowed_arches"]:
             config["base_buildroot"][arch] = []
-        if "base_buildroot" in document["data"]:
-            for arch, pkgs in document["data"]["base_buildroot"].items():
-                if arch not in settings["allowed_arches"]:
-                    log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
-                        file=document_id,
-                        arch=arch
-                    ))
-                    continue
-                if pkgs:
-                    for pkg_raw in pkgs:
-                        pkg = str(pkg_raw)
-                        config["base_buildroot"][arch].append(pkg)
+        for arch, pkgs in document["data"].get("base_buildroot", {}).items():
+            if arch not in settings["allowed_arches"]:
+                log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
+                    file=document_id,
+                    arch=arch
+                ))
+                continue
+            if pkgs:
+                for pkg_raw in pkgs:
+                    pkg = str(pkg_raw)
+                    config["base_buildroot"][arch].append(pkg)
 
         config["source_packages"] = {}
         for arch in settings["allowed_arches"]:
             config["source_packages"][arch] = {}
-        if "source_packages" in document["data"]:
-            for arch, srpms_dict in document["data"]["source_packages"].items():
-                if arch not in settings["allowed_arches"]:
-                    log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
-                        file=document_id,
-                        arch=arch
+        for arch, srpms_dict in document["data"].get("source_packages", {}).items():
+            if arch not in settings["allowed_arches"]:
+                log("  Warning: {file}.yaml lists an unsupported architecture: {arch}. Moving on...".format(
+                    file=document_id,
+                    arch=arch
+                ))
+                continue
+            if not srpms_dict:
+                continue
+            for srpm_name, srpm_data in srpms_dict.items():
+                requires = []
+                try:
+                    for pkg_raw in srpm_data.get("requires", []):
+                        requires.append(str(pkg_raw))
+                except TypeError:
+                    log("  Warning: {file} has an empty 'requires' field defined which is invalid. Moving on...".format(
+                        file=document_id
                     ))
                     continue
-                if not srpms_dict:
-                    continue
-                for srpm_name, srpm_data in srpms_dict.items():
-                    requires = []
-                    if "requires" in srpm_data:
-                        try:
-                            for pkg_raw in srpm_data["requires"]:
-                                requires.append(str(pkg_raw))
-                        except TypeError:
-                            log("  Warning: {file} has an empty 'requires' field defined which is invalid. Moving on...".format(
-                                file=document_id
-                            ))
-                            continue
                     
-                    config["source_packages"][arch][str(srpm_name)] = {}
-                    config["source_packages"][arch][str(srpm_name)]["requires"] = requires
+                config["source_packages"][arch][str(srpm_name)] = {}
+                config["source_packages"][arch][str(srpm_name)]["requires"] = requires
 
         return config
 
@@ -718,6 +719,36 @@ class ConfigManager:
         return config
 
 
+    def _hash_configs(self, file_digests):
+        # Combines the digests of the individual files (by their names)
+        # into a single hash, the same way no matter the order they were read in.
+        configs_hash = hashlib.sha256()
+
+        for file_name in sorted(file_digests):
+            configs_hash.update(file_name.encode())
+            configs_hash.update(file_digests[file_name])
+
+        return configs_hash.hexdigest()
+
+
+    def get_configs_hash(self):
+        # A hash of all the yaml files in the configs directory,
+        # to tell whether anything has changed since the last run.
+        directory = self.settings["configs"]
+
+        file_digests = {}
+
+        for entry in os.scandir(directory):
+            # Only yaml files get loaded
+            if not entry.name.endswith(".yaml") or not entry.is_file():
+                continue
+
+            with open(entry.path, "rb") as file:
+                file_digests[entry.name] = hashlib.sha256(file.read()).digest()
+
+        return self._hash_configs(file_digests)
+
+
     def get_configs(self):
         log("")
 
@@ -744,94 +775,153 @@ class ConfigManager:
 
 
         # Step 1: Load all configs
+        #
+        # Parsing YAML is slow, so the parsed configs are cached
+        # in a JSON file between runs, keyed by a hash of their content,
+        # and only the ones that have changed since then are parsed again.
+        configs_cache_path = self.settings.get("configs_cache_path")
+        configs_cache = {"version": CONFIGS_CACHE_VERSION, "files": {}}
+        configs_cache_next = {"version": CONFIGS_CACHE_VERSION, "files": {}}
+
+        if configs_cache_path:
+            try:
+                cached = load_data(configs_cache_path)
+                if cached.get("version") == CONFIGS_CACHE_VERSION:
+                    configs_cache = cached
+            except (FileNotFoundError, ValueError):
+                pass
+
+        # The hash of exactly the files loaded below,
+        # the same as what get_configs_hash would give for them
+        file_digests = {}
+
         serious_error_messages = set()
         log("Loading yaml files...")
         log("---------------------")
-        for yml_file in os.listdir(directory):
+        for entry in os.scandir(directory):
             # Only accept yaml files
-            if not yml_file.endswith(".yaml"):
+            # (scandir already knows which entries are files, so that's free)
+            if not entry.name.endswith(".yaml") or not entry.is_file():
                 continue
-            
+
+            yml_file = entry.name
             document_id = yml_file.split(".yaml")[0]
 
             try:
-                with open(os.path.join(directory, yml_file), "r") as file:
+                yml_path = entry.path
+
+                with open(yml_path, "rb") as file:
+                    yml_content = file.read()
+
+                # The content is what matters, not the mtime,
+                # because a fresh checkout touches every file.
+                # The same digest goes into the hash of all the configs.
+                yml_digest = hashlib.sha256(yml_content).digest()
+                file_digests[yml_file] = yml_digest
+                yml_hash = yml_digest.hex()
+
+                # Reuse the parsed config from the last run if the file hasn't changed
+                cached_config = configs_cache["files"].get(yml_path)
+                if cached_config and cached_config["hash"] == yml_hash:
+                    document = cached_config["document"]
+
+                    # It came from the cache, so it's fine to cache it again
+                    configs_cache_next["files"][yml_path] = cached_config
+
+                else:
                     # Safely load the config
                     try:
-                        document = yaml.safe_load(file)
+                        document = yaml.load(yml_content, Loader=SafeLoader)
                     except yaml.YAMLError as err:
                         raise ConfigError("Error loading a config '{filename}': {err}".format(
                                     filename=yml_file,
                                     err=err))
-                    
-                    # Only accept yaml files stating their purpose!
-                    if not ("document" in document and "version" in document):
-                        raise ConfigError("'{file}.yaml' - doesn't specify the 'document' and/or the 'version' field.".format(file=yml_file))
-
-
-                    # === Case: Repository config ===
-                    if document["document"] not in [
-                        "content-resolver-buildroot",
-                        "content-resolver-compose-view",
-                        "content-resolver-environment",
-                        "content-resolver-label",
-                        "content-resolver-repository",
-                        "content-resolver-unwanted",
-                        "content-resolver-view",
-                        "content-resolver-view-addon",
-                        "content-resolver-workload",
-                        "feedback-pipeline-buildroot",
-                        "feedback-pipeline-compose-view",
-                        "feedback-pipeline-environment",
-                        "feedback-pipeline-label",
-                        "feedback-pipeline-repository",
-                        "feedback-pipeline-unwanted",
-                        "feedback-pipeline-view",
-                        "feedback-pipeline-view-addon",
-                        "feedback-pipeline-workload",
-                    ]:
-                        raise ConfigError(f"Unknown document type: {document['document']}")
-
-                    if document["document"] in ["content-resolver-repository", "feedback-pipeline-repository"]:
-                        if document["version"] == 1:
-                            configs["repos"][document_id] = self._load_config_repo(document_id, document, self.settings)
-                        
-                        elif document["version"] == 2:
-                            configs["repos"][document_id] = self._load_config_repo_v2(document_id, document, self.settings)
 
-                    # === Case: Environment config ===
-                    if document["document"] in ["content-resolver-environment", "feedback-pipeline-environment"]:
-                        configs["envs"][document_id] = self._load_config_env(document_id, document, self.settings)
+                    # Only cache what comes back from orjson (the cache's
+                    # own format) exactly the same, so things like dates,
+                    # numeric keys, or big integers don't change type
+                    try:
+                        if orjson.loads(orjson.dumps(document)) == document:
+                            configs_cache_next["files"][yml_path] = {
+                                "hash": yml_hash,
+                                "document": document
+                            }
+                    except (TypeError, ValueError):
+                        pass
+                
+                # Only accept yaml files stating their purpose!
+                if "document" not in document or "version" not in document:
+                    raise ConfigError("'{file}.yaml' - doesn't specify the 'document' and/or the 'version' field.".format(file=yml_file))
+
+
+                # === Case: Repository config ===
+                if document["document"] not in [
+                    "content-resolver-buildroot",
+                    "content-resolver-compose-view",
+                    "content-resolver-environment",
+                    "content-resolver-label",
+                    "content-resolver-repository",
+                    "content-resolver-unwanted",
+                    "content-resolver-view",
+                    "content-resolver-view-addon",
+                    "content-resolver-workload",
+                    "feedback-pipeline-buildroot",
+                    "feedback-pipeline-compose-view",
+                    "feedback-pipeline-environment",
+                    "feedback-pipeline-label",
+                    "feedback-pipeline-repository",
+                    "feedback-pipeline-unwanted",
+                    "feedback-pipeline-view",
+                    "feedback-pipeline-view-addon",
+                    "feedback-pipeline-workload",
+                ]:
+                    raise ConfigError(f"Unknown document type: {document['document']}")
 
-                    # === Case: Workload config ===
-                    if document["document"] in ["content-resolver-workload", "feedback-pipeline-workload"]:
-                        configs["workloads"][document_id] = self._load_config_workload(document_id, document, self.settings)
+                if document["document"] in ["content-resolver-repository", "feedback-pipeline-repository"]:
+                    if document["version"] == 1:
+                        configs["repos"][document_id] = self._load_config_repo(document_id, document, self.settings)
                     
-                    # === Case: Label config ===
-                    if document["document"] in ["content-resolver-label", "feedback-pipeline-label"]:
-                        configs["labels"][document_id] = self._load_config_label(document_id, document, self.settings)
+                    elif document["version"] == 2:
+                        configs["repos"][document_id] = self._load_config_repo_v2(document_id, document, self.settings)
 
-                    # === Case: View config ===
-                    #  (Also including the legacy "feedback-pipeline-compose-view" for backwards compatibility)
-                    if document["document"] in ["content-resolver-view", "content-resolver-compose-view", "feedback-pipeline-view", "feedback-pipeline-compose-view"]:
-                        configs["views"][document_id] = self._load_config_compose_view(document_id, document, self.settings)
+                # === Case: Environment config ===
+                if document["document"] in ["content-resolver-environment", "feedback-pipeline-environment"]:
+                    configs["envs"][document_id] = self._load_config_env(document_id, document, self.settings)
 
-                    # === Case: View addon config ===
-                    if document["document"] in ["content-resolver-view-addon", "feedback-pipeline-view-addon"]:
-                        configs["views"][document_id] = self._load_config_addon_view(document_id, document, self.settings)
+                # === Case: Workload config ===
+                if document["document"] in ["content-resolver-workload", "feedback-pipeline-workload"]:
+                    configs["workloads"][document_id] = self._load_config_workload(document_id, document, self.settings)
+                
+                # === Case: Label config ===
+                if document["document"] in ["content-resolver-label", "feedback-pipeline-label"]:
+                    configs["labels"][document_id] = self._load_config_label(document_id, document, self.settings)
 
-                    # === Case: Unwanted config ===
-                    if document["document"] in ["content-resolver-unwanted", "feedback-pipeline-unwanted"]:
-                        configs["unwanteds"][document_id] = self._load_config_unwanted(document_id, document, self.settings)
+                # === Case: View config ===
+                #  (Also including the legacy "feedback-pipeline-compose-view" for backwards compatibility)
+                if document["document"] in ["content-resolver-view", "content-resolver-compose-view", "feedback-pipeline-view", "feedback-pipeline-compose-view"]:
+                    configs["views"][document_id] = self._load_config_compose_view(document_id, document, self.settings)
 
-                    # === Case: Buildroot config ===
-                    if document["document"] in ["content-resolver-buildroot", "feedback-pipeline-buildroot"]:
-                        configs["buildroots"][document_id] = self._load_config_buildroot(document_id, document, self.settings)
+                # === Case: View addon config ===
+                if document["document"] in ["content-resolver-view-addon", "feedback-pipeline-view-addon"]:
+                    configs["views"][document_id] = self._load_config_addon_view(document_id, document, self.settings)
+
+                # === Case: Unwanted config ===
+                if document["document"] in ["content-resolver-unwanted", "feedback-pipeline-unwanted"]:
+                    configs["unwanteds"][document_id] = self._load_config_unwanted(document_id, document, self.settings)
+
+                # === Case: Buildroot config ===
+                if document["document"] in ["content-resolver-buildroot", "feedback-pipeline-buildroot"]:
+                    configs["buildroots"][document_id] = self._load_config_buildroot(document_id, document, self.settings)
 
             except ConfigError as err:
                 serious_error_messages.add(str(err))
                 continue
 
+        if configs_cache_path:
+            dump_data(configs_cache_path, configs_cache_next)
+
+        self.configs_hash = self._hash_configs(file_digests)
+
         if serious_error_messages:
             log("")
             log("  -------------------------------------------------------------------------")
@@ -958,7 +1048,7 @@ class ConfigManager:
                     repo_id = view_conf["repository"]
                     if arch in configs["repos"][repo_id]["source"]["architectures"]:
                         actual_arches.add(arch)
-                view_conf["architectures"] = sorted(list(actual_arches))
+                view_conf["architectures"] = sorted(actual_arches)
 
         # Adjust addon view architecture based on its base view architectures        
         for view_conf_id, view_conf in configs["views"].items():
@@ -970,7 +1060,7 @@ class ConfigManager:
                     base_view_id = view_conf["base_view_id"]
                     if arch in configs["views"][base_view_id]["architectures"]:
                         actual_arches.add(arch)
-                view_conf["architectures"] = sorted(list(actual_arches))
+                view_conf["architectures"] = sorted(actual_arches)
         
         # FIXME: Check other configs, too!
 
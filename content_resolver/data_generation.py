@@ -34,7 +34,7 @@ def _generate_txt_file(data_list, file_name, settings):
     log("  Writing file...  ({filename})".format(
         filename=filename
     ))
-    with open(os.path.join(output, filename), "w") as file:
+    with open(os.path.join(output, filename), "w", buffering=1<<20) as file:
         file.write(file_contents)
 
 
@@ -151,7 +151,7 @@ def _generate_view_lists(query):
                     view_conf_id=view_conf_id,
                     arch=arch
                 )
-                _generate_txt_file(sorted(list(list_content)), file_name, query.settings)
+                _generate_txt_file(sorted(list_content), file_name, query.settings)
 
                 # Populate the all-arch lists
                 if list_name not in all_arches_lists:
@@ -166,7 +166,7 @@ def _generate_view_lists(query):
                 list_name=list_name,
                 view_conf_id=view_conf_id
             )
-            _generate_txt_file(sorted(list(list_content)), file_name, query.settings)
+            _generate_txt_file(sorted(list_content), file_name, query.settings)
     
     log("Done!")
     log("")
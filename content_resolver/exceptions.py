@@ -25,3 +25,8 @@ class KojiRootLogError(Exception):
 
 class AnalysisError(Exception):
     pass
+
+
+class OutputGenerationError(Exception):
+    # Error while generating the pages and data outputs
+    pass
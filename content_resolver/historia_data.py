@@ -1,9 +1,8 @@
 import datetime
-import json
 import os
 import re
 from content_resolver.data_generation import _generate_json_file
-from content_resolver.utils import dump_data, err_log, log
+from content_resolver.utils import dump_data, err_log, load_data, log
 
 
 def _save_current_historic_data(query):
@@ -12,19 +11,18 @@ def _save_current_historic_data(query):
 
     log("Generating current historic data...")
 
+    # The time is only read once, so the file name and the date
+    # inside can't end up on different sides of midnight
+    now = datetime.datetime.now()
+
     # Where to save it
-    year = datetime.datetime.now().strftime("%Y")
-    week = datetime.datetime.now().strftime("%W")
-    filename = "historic_data-{year}-week_{week}.json".format(
-        year=year,
-        week=week
-    )
+    filename = now.strftime("historic_data-%Y-week_%W.json")
     output_dir = os.path.join(query.settings["output"], "history")
     file_path = os.path.join(output_dir, filename)
 
     # What to save there
     history_data = {}
-    history_data["date"] = str(datetime.datetime.now().strftime("%Y-%m-%d"))
+    history_data["date"] = now.date().isoformat()
     history_data["workloads"] = {}
     history_data["envs"] = {}
     history_data["repos"] = {}
@@ -109,24 +107,18 @@ def _read_historic_data(query):
     historic_data = {}
 
     for filename in valid_filenames:
-        with open(os.path.join(directory, filename), "r") as file:
-            try:
-                document = json.load(file)
-
-                date = datetime.datetime.strptime(document["date"],"%Y-%m-%d")
-                year = date.strftime("%Y")
-                week = date.strftime("%W")
-                key = "{year}-week_{week}".format(
-                    year=year,
-                    week=week
-                )
-            except (KeyError, ValueError):
-                err_log("Invalid file in historic data: {filename}. Ignoring.".format(
-                    filename=filename
-                ))
-                continue
+        try:
+            document = load_data(os.path.join(directory, filename))
+
+            date = datetime.datetime.strptime(document["date"],"%Y-%m-%d")
+            key = date.strftime("%Y-week_%W")
+        except (KeyError, ValueError):
+            err_log("Invalid file in historic data: {filename}. Ignoring.".format(
+                filename=filename
+            ))
+            continue
 
-            historic_data[key] = document
+        historic_data[key] = document
 
     return historic_data
 
@@ -134,18 +126,44 @@ def _read_historic_data(query):
     log("")
 
 
+def _size_history_mb(historic_data, entries_key):
+    # Sizes of all the workloads or envs in every snapshot, by their id.
+    # Snapshots without a given id have a "null" in its place.
+    size_history = {}
+
+    for index, entry in enumerate(historic_data.values()):
+        for entry_id, entry_data in entry.get(entries_key, {}).items():
+            if "size" not in entry_data:
+                continue
+
+            if entry_id not in size_history:
+                size_history[entry_id] = ["null"] * len(historic_data)
+
+            # The chart needs the size in MB, but just as a number
+            size_history[entry_id][index] = "{0:.1f}".format(entry_data["size"]/(1024*1024))
+
+    return size_history
+
+
 def _generate_chartjs_data(historic_data, query):
 
+    # The dates are the chart labels for every single chart,
+    # so they're only collected once
+    labels = [entry["date"] for entry in historic_data.values()]
+
+    # Same with the sizes. Each snapshot only gets walked once,
+    # no matter how many charts show the same workload or env.
+    workload_size_history = _size_history_mb(historic_data, "workloads")
+    env_size_history = _size_history_mb(historic_data, "envs")
+    no_size_history = ["null"] * len(historic_data)
+
     # Data for workload pages
     for workload_id in query.workloads(None, None, None, None, list_all=True):
 
         entry_data = {}
 
         # First, get the dates as chart labels
-        entry_data["labels"] = []
-        for _,entry in historic_data.items():
-            date = entry["date"]
-            entry_data["labels"].append(date)
+        entry_data["labels"] = labels
 
         # Second, get the actual data for everything that's needed
         entry_data["datasets"] = []
@@ -159,15 +177,7 @@ def _generate_chartjs_data(historic_data, query):
         dataset["label"] = workload_conf["name"]
         dataset["fill"] = "false"
 
-        for _,entry in historic_data.items():
-            try:
-                size = entry["workloads"][workload_id]["size"]
-
-                # The chart needs the size in MB, but just as a number
-                size_mb = "{0:.1f}".format(size/1024/1024)
-                dataset["data"].append(size_mb)
-            except KeyError:
-                dataset["data"].append("null")
+        dataset["data"] = workload_size_history.get(workload_id, no_size_history)
 
         entry_data["datasets"].append(dataset)
 
@@ -183,10 +193,7 @@ def _generate_chartjs_data(historic_data, query):
             entry_data = {}
 
             # First, get the dates as chart labels
-            entry_data["labels"] = []
-            for _,entry in historic_data.items():
-                date = entry["date"]
-                entry_data["labels"].append(date)
+            entry_data["labels"] = labels
 
             # Second, get the actual data for everything that's needed
             entry_data["datasets"] = []
@@ -206,15 +213,7 @@ def _generate_chartjs_data(historic_data, query):
                 dataset["fill"] = "false"
 
 
-                for _,entry in historic_data.items():
-                    try:
-                        size = entry["workloads"][workload_id]["size"]
-
-                        # The chart needs the size in MB, but just as a number
-                        size_mb = "{0:.1f}".format(size/1024/1024)
-                        dataset["data"].append(size_mb)
-                    except KeyError:
-                        dataset["data"].append("null")
+                dataset["data"] = workload_size_history.get(workload_id, no_size_history)
 
                 entry_data["datasets"].append(dataset)
 
@@ -236,10 +235,7 @@ def _generate_chartjs_data(historic_data, query):
                 entry_data = {}
 
                 # First, get the dates as chart labels
-                entry_data["labels"] = []
-                for _,entry in historic_data.items():
-                    date = entry["date"]
-                    entry_data["labels"].append(date)
+                entry_data["labels"] = labels
 
                 # Second, get the actual data for everything that's needed
                 entry_data["datasets"] = []
@@ -257,15 +253,7 @@ def _generate_chartjs_data(historic_data, query):
                     )
                     dataset["fill"] = "false"
 
-                    for _,entry in historic_data.items():
-                        try:
-                            size = entry["workloads"][workload_id]["size"]
-
-                            # The chart needs the size in MB, but just as a number
-                            size_mb = "{0:.1f}".format(size/1024/1024)
-                            dataset["data"].append(size_mb)
-                        except KeyError:
-                            dataset["data"].append("null")
+                    dataset["data"] = workload_size_history.get(workload_id, no_size_history)
 
                     entry_data["datasets"].append(dataset)
 
@@ -288,10 +276,7 @@ def _generate_chartjs_data(historic_data, query):
                 entry_data = {}
 
                 # First, get the dates as chart labels
-                entry_data["labels"] = []
-                for _,entry in historic_data.items():
-                    date = entry["date"]
-                    entry_data["labels"].append(date)
+                entry_data["labels"] = labels
 
                 # Second, get the actual data for everything that's needed
                 entry_data["datasets"] = []
@@ -309,15 +294,7 @@ def _generate_chartjs_data(historic_data, query):
                     )
                     dataset["fill"] = "false"
 
-                    for _,entry in historic_data.items():
-                        try:
-                            size = entry["workloads"][workload_id]["size"]
-
-                            # The chart needs the size in MB, but just as a number
-                            size_mb = "{0:.1f}".format(size/1024/1024)
-                            dataset["data"].append(size_mb)
-                        except KeyError:
-                            dataset["data"].append("null")
+                    dataset["data"] = workload_size_history.get(workload_id, no_size_history)
 
                     entry_data["datasets"].append(dataset)
 
@@ -334,10 +311,7 @@ def _generate_chartjs_data(historic_data, query):
         entry_data = {}
 
         # First, get the dates as chart labels
-        entry_data["labels"] = []
-        for _,entry in historic_data.items():
-            date = entry["date"]
-            entry_data["labels"].append(date)
+        entry_data["labels"] = labels
 
         # Second, get the actual data for everything that's needed
         entry_data["datasets"] = []
@@ -352,15 +326,7 @@ def _generate_chartjs_data(historic_data, query):
         dataset["fill"] = "false"
 
 
-        for _,entry in historic_data.items():
-            try:
-                size = entry["envs"][env_id]["size"]
-
-                # The chart needs the size in MB, but just as a number
-                size_mb = "{0:.1f}".format(size/1024/1024)
-                dataset["data"].append(size_mb)
-            except KeyError:
-                dataset["data"].append("null")
+        dataset["data"] = env_size_history.get(env_id, no_size_history)
 
         entry_data["datasets"].append(dataset)
 
@@ -376,10 +342,7 @@ def _generate_chartjs_data(historic_data, query):
             entry_data = {}
 
             # First, get the dates as chart labels
-            entry_data["labels"] = []
-            for _,entry in historic_data.items():
-                date = entry["date"]
-                entry_data["labels"].append(date)
+            entry_data["labels"] = labels
 
             # Second, get the actual data for everything that's needed
             entry_data["datasets"] = []
@@ -399,15 +362,7 @@ def _generate_chartjs_data(historic_data, query):
                 dataset["fill"] = "false"
 
 
-                for _,entry in historic_data.items():
-                    try:
-                        size = entry["envs"][env_id]["size"]
-
-                        # The chart needs the size in MB, but just as a number
-                        size_mb = "{0:.1f}".format(size/1024/1024)
-                        dataset["data"].append(size_mb)
-                    except KeyError:
-                        dataset["data"].append("null")
+                dataset["data"] = env_size_history.get(env_id, no_size_history)
 
                 entry_data["datasets"].append(dataset)
 
@@ -428,10 +383,7 @@ def _generate_chartjs_data(historic_data, query):
             entry_data = {}
 
             # First, get the dates as chart labels
-            entry_data["labels"] = []
-            for _,entry in historic_data.items():
-                date = entry["date"]
-                entry_data["labels"].append(date)
+            entry_data["labels"] = labels
 
             # Second, get the actual data for everything that's needed
             entry_data["datasets"] = []
@@ -447,15 +399,7 @@ def _generate_chartjs_data(historic_data, query):
                 )
                 dataset["fill"] = "false"
 
-                for _,entry in historic_data.items():
-                    try:
-                        size = entry["envs"][env_id]["size"]
-
-                        # The chart needs the size in MB, but just as a number
-                        size_mb = "{0:.1f}".format(size/1024/1024)
-                        dataset["data"].append(size_mb)
-                    except KeyError:
-                        dataset["data"].append("null")
+                dataset["data"] = env_size_history.get(env_id, no_size_history)
 
                 entry_data["datasets"].append(dataset)
 
@@ -472,11 +416,7 @@ def _generate_chartjs_data(historic_data, query):
         entry_data = {}
 
         # First, get the dates as chart labels
-        entry_data["labels"] = []
-
-        for _,entry in historic_data.items():
-            date = entry["date"]
-            entry_data["labels"].append(date)
+        entry_data["labels"] = labels
 
         # Second, get the actual data for everything that's needed
         entry_data["datasets"] = []
@@ -1,7 +1,7 @@
 import os
 import subprocess
 import jinja2
-from content_resolver.utils import dump_data, log
+from content_resolver.utils import dump_data, log, run_forked
 
 
 def _generate_html_page(template_name, template_data, page_name, settings):
@@ -21,8 +21,6 @@ def _generate_html_page(template_name, template_data, page_name, settings):
         template_data = {}
     template_data["global_refresh_time_started"] = settings["global_refresh_time_started"]
 
-    page = template.render(**template_data)
-
     filename = ("{page_name}.html".format(
         page_name=page_name.replace(":", "--")
     ))
@@ -30,8 +28,10 @@ def _generate_html_page(template_name, template_data, page_name, settings):
     log("  Writing file...  ({filename})".format(
         filename=filename
     ))
-    with open(os.path.join(output, filename), "w") as file:
-        file.write(page)
+    # The page gets streamed into a big file buffer instead of
+    # being rendered into one huge string first
+    with open(os.path.join(output, filename), "w", buffering=1<<20) as file:
+        template.stream(**template_data).dump(file)
     
     log("  Done!")
     log("")
@@ -515,7 +515,7 @@ def _dump_all_data(query):
     log("")
 
 
-def generate_pages(query):
+def generate_pages(query, other_generators=()):
 
     log("")
     log("###############################################################################")
@@ -524,11 +524,16 @@ def generate_pages(query):
     log("")
 
     # Create the jinja2 thingy
+    # Templates don't change during a run, so there's no need
+    # to check them on disk every time a page gets rendered.
+    # And the compiled ones are kept between runs, too.
     template_loader = jinja2.FileSystemLoader(searchpath="./templates/")
     template_env = jinja2.Environment(
         loader=template_loader,
         trim_blocks=True,
-        lstrip_blocks=True
+        lstrip_blocks=True,
+        auto_reload=False,
+        bytecode_cache=jinja2.FileSystemBytecodeCache()
     )
     query.settings["jinja2_template_env"] = template_env
 
@@ -536,7 +541,8 @@ def generate_pages(query):
     log("Copying static files...")
     src_static_dir = os.path.join("templates", "_static")
     output_static_dir = os.path.join(query.settings["output"])
-    subprocess.run(["cp", "-R", src_static_dir, output_static_dir])
+    # Cloned rather than copied where the filesystem supports it
+    subprocess.run(["cp", "-R", "--reflink=auto", src_static_dir, output_static_dir])
     log("  Done!")
     log("")
 
@@ -560,20 +566,18 @@ def generate_pages(query):
     _generate_html_page("views", template_data, "views", query.settings)
     _generate_html_page("maintainers", template_data, "maintainers", query.settings)
     
-    # Generate repo pages
-    _generate_repo_pages(query)
-
-    # Generate maintainer pages
-    _generate_maintainer_pages(query)
-
-    # Generate env_overview pages
-    _generate_env_pages(query)
-
-    # Generate workload_overview pages
-    _generate_workload_pages(query)
-
-    # Generate view pages
-    _generate_view_pages(query)
+    # Generate repo, maintainer, env_overview, workload_overview,
+    # and view pages
+    # Each of these writes its own set of files and only reads the query,
+    # so they get rendered in separate processes at the same time,
+    # together with any other generators passed in by the caller.
+    run_forked([
+        _generate_repo_pages,
+        _generate_maintainer_pages,
+        _generate_env_pages,
+        _generate_workload_pages,
+        _generate_view_pages,
+    ] + list(other_generators), query, query.settings["max_subprocesses"])
 
     # Dump all data
     # The data is now pretty huge and not really needed anyway
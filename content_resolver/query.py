@@ -16,6 +16,9 @@ class Query():
 
         self.computed_data = {}
 
+    # The same packages show up on many pages, so their sizes get
+    # formatted once and then just looked up
+    @lru_cache(maxsize = None)
     def size(self, num, suffix='B'):
         for unit in ['','k','M','G']:
             if abs(num) < 1024.0:
@@ -24,6 +27,18 @@ class Query():
         return "%.1f %s%s" % (num, 'T', suffix)
         
 
+    @lru_cache(maxsize = None)
+    def _workload_conf_ids_by_env(self):
+        # All workload_conf_ids grouped by the env they've been analyzed in,
+        # so looking up workloads of an env doesn't need to try every workload_conf
+        workload_conf_ids_by_env = {}
+
+        for workload in self.data["workloads"].values():
+            env = (workload["env_conf_id"], workload["repo_id"], workload["arch"])
+            workload_conf_ids_by_env.setdefault(env, []).append(workload["workload_conf_id"])
+
+        return workload_conf_ids_by_env
+
     @lru_cache(maxsize = None)
     def workloads(self, workload_conf_id, env_conf_id, repo_id, arch, list_all=False, output_change=None):
         # accepts none in any argument, and in those cases, answers for all instances
@@ -38,10 +53,12 @@ class Query():
         matching_ids = set()
 
         # list considered workload_conf_ids
+        # (when not specified, only those analyzed in each env get considered below)
         if workload_conf_id:
             workload_conf_ids = [workload_conf_id]
         else:
-            workload_conf_ids = self.configs["workloads"].keys()
+            workload_conf_ids = None
+        workload_conf_ids_by_env = self._workload_conf_ids_by_env()
 
         # list considered env_conf_ids
         if env_conf_id:
@@ -65,10 +82,15 @@ class Query():
         # This is a terrible amount of loops. But most cases will have just one item
         # in most of those, anyway. No one is expected to run this method with
         # a "None" for every argument!
-        for workload_conf_id in workload_conf_ids:
-            for env_conf_id in env_conf_ids:
-                for repo_id in repo_ids:
-                    for arch in arches:
+        for env_conf_id in env_conf_ids:
+            for repo_id in repo_ids:
+                for arch in arches:
+                    if workload_conf_ids is None:
+                        env_workload_conf_ids = workload_conf_ids_by_env.get((env_conf_id, repo_id, arch), [])
+                    else:
+                        env_workload_conf_ids = workload_conf_ids
+
+                    for workload_conf_id in env_workload_conf_ids:
                         workload_id = "{workload_conf_id}:{env_conf_id}:{repo_id}:{arch}".format(
                             workload_conf_id=workload_conf_id,
                             env_conf_id=env_conf_id,
@@ -92,7 +114,7 @@ class Query():
         
         if not list_all:
             return False
-        return sorted(list(matching_ids))
+        return sorted(matching_ids)
     
     @lru_cache(maxsize = None)
     def workloads_id(self, id, list_all=False, output_change=None):
@@ -175,7 +197,7 @@ class Query():
         # This means nothing has been found!
         if not list_all:
             return False
-        return sorted(list(matching_ids))
+        return sorted(matching_ids)
     
     @lru_cache(maxsize = None)
     def envs_id(self, id, list_all=False, output_change=None):
@@ -342,7 +364,7 @@ class Query():
                         elif output_change == "source_names":
                             pkg_names.add(pkg["source_name"])
             
-            names_sorted = sorted(list(pkg_names))
+            names_sorted = sorted(pkg_names)
             return names_sorted
                         
 
@@ -575,6 +597,18 @@ class Query():
     def url_slug_id(self, any_id):
         return any_id.replace(":", "--")
     
+    @lru_cache(maxsize = None)
+    def _workload_ids_by_repo_arch(self):
+        # All workloads grouped by their repo and arch, so views don't
+        # need to try every workload_conf and env_conf combination
+        workload_ids_by_repo_arch = {}
+
+        for workload_id, workload in self.data["workloads"].items():
+            repo_arch = (workload["repo_id"], workload["arch"])
+            workload_ids_by_repo_arch.setdefault(repo_arch, []).append(workload_id)
+
+        return workload_ids_by_repo_arch
+
     @lru_cache(maxsize = None)
     def workloads_in_view(self, view_conf_id, arch, maintainer=None):
         view_conf = self.configs["views"][view_conf_id]
@@ -590,9 +624,16 @@ class Query():
             return []
 
         # First, get a set of workloads matching the repo and the arch
+        if arch:
+            arches = [arch]
+        else:
+            arches = self.settings["allowed_arches"]
+
+        workload_ids_by_repo_arch = self._workload_ids_by_repo_arch()
+
         too_many_workload_ids = set()
-        workload_ids = self.workloads(None,None,repo_id,arch,list_all=True)
-        too_many_workload_ids.update(workload_ids)
+        for one_arch in arches:
+            too_many_workload_ids.update(workload_ids_by_repo_arch.get((repo_id, one_arch), []))
 
         # Second, limit that set further by matching the label
         final_workload_ids = set()
@@ -611,7 +652,7 @@ class Query():
                 if workload_label in labels:
                     final_workload_ids.add(workload_id)
 
-        return sorted(list(final_workload_ids))
+        return sorted(final_workload_ids)
     
     @lru_cache(maxsize = None)
     def arches_in_view(self, view_conf_id, maintainer=None):
@@ -812,7 +853,7 @@ class Query():
                 elif output_change == "source_names":
                     pkg_names.add(pkg["source_name"])
             
-            names_sorted = sorted(list(pkg_names))
+            names_sorted = sorted(pkg_names)
             return names_sorted
                         
 
@@ -893,7 +934,7 @@ class Query():
                 if pkg["srpm_name"]:
                     srpms.add(pkg["srpm_name"])
 
-            srpm_names_sorted = sorted(list(srpms))
+            srpm_names_sorted = sorted(srpms)
             return srpm_names_sorted
         
         return pkgs
@@ -948,17 +989,23 @@ class Query():
         return True
     
 
-    def _srpm_name_to_rpm_names(self, srpm_name, repo_id):
+    @lru_cache(maxsize = None)
+    def _rpm_names_by_srpm_name(self, repo_id):
+        # All package names in a repo grouped by their SRPM name,
+        # so the packages are only gone through once per repo
         all_pkgs_by_arch = self.data["pkgs"][repo_id]
 
-        pkg_names = set()
+        rpm_names_by_srpm_name = {}
 
         for arch, pkgs in all_pkgs_by_arch.items():
             for pkg_id, pkg in pkgs.items():
-                if pkg["source_name"] == srpm_name:
-                    pkg_names.add(pkg["name"])
+                rpm_names_by_srpm_name.setdefault(pkg["source_name"], set()).add(pkg["name"])
 
-        return pkg_names
+        return rpm_names_by_srpm_name
+
+
+    def _srpm_name_to_rpm_names(self, srpm_name, repo_id):
+        return self._rpm_names_by_srpm_name(repo_id).get(srpm_name, set())
 
     
     @lru_cache(maxsize = None)
@@ -1,22 +1,27 @@
 import datetime
 import json
+import multiprocessing
+import multiprocessing.connection
 import re
 import sys
+from functools import lru_cache
 import jinja2
+import orjson
+from content_resolver.exceptions import OutputGenerationError
 
-class SetEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, set):
-            return list(obj)
-        if isinstance(obj, jinja2.Environment):
-            return ""
-        return json.JSONEncoder.default(self, obj)
+def _json_default(obj):
+    # Whatever orjson can't serialize on its own
+    if isinstance(obj, set):
+        return list(obj)
+    if isinstance(obj, jinja2.Environment):
+        return ""
+    raise TypeError
 
 
 
 def load_data(path):
-    with open(path, 'r') as file:
-        data = json.load(file)
+    with open(path, 'rb') as file:
+        data = orjson.loads(file.read())
     return data
 
 def log(msg):
@@ -26,14 +31,24 @@ def log(msg):
 def err_log(msg):
     print("ERROR LOG:  {}".format(msg), file=sys.stderr)
 
+# The same IDs get converted over and over again while building the views,
+# so each of them only gets split once
+@lru_cache(maxsize = None)
 def pkg_id_to_name(pkg_id):
     pkg_name = pkg_id.rsplit("-",2)[0]
     return pkg_name
 
 
 def dump_data(path, data):
-    with open(path, 'w') as file:
-        json.dump(data, file, cls=SetEncoder)
+    # Serialize first, so a failure doesn't truncate the previous file
+    try:
+        content = orjson.dumps(data, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        # orjson only handles 64-bit integers, the json module handles any
+        content = json.dumps(data, default=_json_default).encode()
+
+    with open(path, 'wb') as file:
+        file.write(content)
 
 
 def size(num, suffix='B'):
@@ -44,8 +59,9 @@ def size(num, suffix='B'):
     return "%.1f %s%s" % (num, 'T', suffix)
 
 
+@lru_cache(maxsize = None)
 def workload_id_to_conf_id(workload_id):
-    workload_conf_id = workload_id.split(":")[0]
+    workload_conf_id = workload_id.partition(":")[0]
     return workload_conf_id
 
 def url_to_id(url):
@@ -66,4 +82,46 @@ def url_to_id(url):
 
 
 def datetime_now_string():
-    return datetime.datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
\ No newline at end of file
+    return datetime.datetime.now().strftime("%m/%d/%Y, %H:%M:%S")
+
+
+def run_forked(functions, query, max_processes):
+    # Runs every function with the query in its own forked process,
+    # up to max_processes at the same time, and waits for all of them.
+    # Forked processes see the query without it being pickled over,
+    # but each of them ends up with its own copy as it touches it,
+    # so the number of them running at once is limited.
+    fork_context = multiprocessing.get_context("fork")
+
+    waiting_functions = list(functions)
+    running_processes = []
+
+    try:
+        while waiting_functions or running_processes:
+            while waiting_functions and len(running_processes) < max_processes:
+                function = waiting_functions.pop(0)
+                process = fork_context.Process(target=function, args=(query,), name=function.__name__)
+                process.start()
+                running_processes.append(process)
+
+            # Wait for at least one of them to finish
+            multiprocessing.connection.wait([process.sentinel for process in running_processes])
+
+            for process in list(running_processes):
+                if process.is_alive():
+                    continue
+
+                process.join()
+                running_processes.remove(process)
+
+                if process.exitcode != 0:
+                    raise OutputGenerationError("'{name}' failed with exit code {exitcode}".format(
+                        name=process.name,
+                        exitcode=process.exitcode
+                    ))
+
+    finally:
+        # Don't leave anything running behind when something went wrong
+        for process in running_processes:
+            process.terminate()
+            process.join()
@@ -1,56 +1,140 @@
 #!/usr/bin/python3
 
-import json, requests
+import os, sys, shutil, requests, ijson, orjson
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 
-def log(msg):
-    pass
-    #print(msg)
+# Set to True to see what's going on
+DEBUG = False
+
 
 def load_data(path):
-    with open(path, 'r') as file:
-        data = json.load(file)
+    with open(path, 'rb') as file:
+        data = orjson.loads(file.read())
     return data
 
 
+def dump_data(path, data):
+    with open(path, 'wb') as file:
+        file.write(orjson.dumps(data))
+
+
+def open_pkg_data(url):
+    # The feed is cached on disk and only downloaded again
+    # when the server says it has changed since the last run.
+    cache_dir = os.path.join(os.path.expanduser("~"), ".cache", "eln_repo_split")
+    data_path = os.path.join(cache_dir, "view-eln.json")
+    headers_path = os.path.join(cache_dir, "view-eln.headers.json")
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    request_headers = {}
+    if os.path.exists(data_path) and os.path.exists(headers_path):
+        cached_headers = load_data(headers_path)
+        if cached_headers.get("etag"):
+            request_headers["If-None-Match"] = cached_headers["etag"]
+        if cached_headers.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached_headers["last_modified"]
+
+    # The timeout is for connecting and for each read, not the whole download,
+    # so a stalled server doesn't hang the script forever.
+    with requests.get(url, headers=request_headers, stream=True, timeout=20) as response:
+
+        if response.status_code == 304:
+            if DEBUG:
+                print("  Not modified, using the cached copy.")
+            return open(data_path, "rb")
+
+        response.raise_for_status()
+        response.raw.decode_content = True
+
+        # Write it next to the old copy first, and only then replace it,
+        # so an interrupted download doesn't leave a broken cache behind.
+        tmp_data_path = data_path + ".tmp"
+        with open(tmp_data_path, "wb") as file:
+            shutil.copyfileobj(response.raw, file)
+        os.replace(tmp_data_path, data_path)
+
+        dump_data(headers_path, {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        })
+
+    return open(data_path, "rb")
+
+
 def pkg_id_to_name(pkg_id):
     pkg_name = pkg_id.rsplit("-",2)[0]
     return pkg_name
 
 
-def real_repo_name(repo_name):
-    repos = {
-        "BaseOS": "BaseOS",
-        "AppStream": "AppStream",
-        "CRB": "CRB",
-        "HA": "HighAvailability",
-        "NFV": "NFV",
-        "RT": "RT",
-        "SAP": "SAP",
-        "SAPHANA": "SAPHANA"
-    }
-
-    return repos[repo_name]
+REAL_REPO_NAMES = {
+    "BaseOS": "BaseOS",
+    "AppStream": "AppStream",
+    "CRB": "CRB",
+    "HA": "HighAvailability",
+    "NFV": "NFV",
+    "RT": "RT",
+    "SAP": "SAP",
+    "SAPHANA": "SAPHANA"
+}
 
 
+def real_repo_name(repo_name):
+    return REAL_REPO_NAMES[repo_name]
+
+
+class PkgEntry:
+    # A single package on a single arch.
+    # There's lots of these, so they're kept small.
+    __slots__ = (
+        "name",
+        "source_name",
+        "rpm_arches",
+        "required_in_workloads",
+        "required_by",
+        "level_number",
+        "user_repo_wishes",
+    )
+
+    def __init__(self, name, source_name, rpm_arches, level_number):
+
+        # Stuff from Content Resolver
+        self.name = name
+        self.source_name = source_name
+        self.rpm_arches = rpm_arches
+        self.required_in_workloads = False
+        self.required_by = set()
+        self.level_number = level_number
+
+        # Users can wish for any package to be in any repo.
+        # All this algorighm cares about is the repos, it doesn't
+        # need to know who wanted what.
+        self.user_repo_wishes = set()
+
+
+# The settings never change, so they're only built once
+@lru_cache(maxsize = None)
 def load_settings():
     settings = {}
 
-    settings["allowed_arches"] = ["aarch64","ppc64le","s390x","x86_64"]
+    settings["allowed_arches"] = ("aarch64","ppc64le","s390x","x86_64")
 
     settings["repos"] = {
-        "BaseOS": ["aarch64", "ppc64le", "s390x", "x86_64"],
-        "AppStream": ["aarch64", "ppc64le", "s390x", "x86_64"],
-        "CRB": ["aarch64", "ppc64le", "s390x", "x86_64"],
-        "buildroot-only": ["aarch64", "ppc64le", "s390x", "x86_64"],
-        "HA": ["aarch64", "ppc64le", "s390x", "x86_64"],
-        "NFV": ["x86_64"],
-        "RT": ["x86_64"],
-        "SAP": ["ppc64le", "s390x", "x86_64"],
-        "SAPHANA": ["ppc64le", "x86_64"]
+        "BaseOS": frozenset(["aarch64", "ppc64le", "s390x", "x86_64"]),
+        "AppStream": frozenset(["aarch64", "ppc64le", "s390x", "x86_64"]),
+        "CRB": frozenset(["aarch64", "ppc64le", "s390x", "x86_64"]),
+        "buildroot-only": frozenset(["aarch64", "ppc64le", "s390x", "x86_64"]),
+        "HA": frozenset(["aarch64", "ppc64le", "s390x", "x86_64"]),
+        "NFV": frozenset(["x86_64"]),
+        "RT": frozenset(["x86_64"]),
+        "SAP": frozenset(["ppc64le", "s390x", "x86_64"]),
+        "SAPHANA": frozenset(["ppc64le", "x86_64"])
     }
 
-    settings["repo_names_sorted_for_print"] = [
+    settings["repo_names_sorted_for_print"] = (
         "BaseOS",
         "AppStream",
         "CRB",
@@ -60,19 +144,424 @@ def load_settings():
         "RT",
         "SAP",
         "SAPHANA",
-    ]
+    )
 
-    settings["addon_repos"] = [
+    settings["addon_repos"] = frozenset([
         "HA",
         "NFV",
         "RT",
         "SAP",
         "SAPHANA",
-    ]
+    ])
 
     return settings
 
 
+# Only ever used to look things up, hence the frozensets
+WISHES_HARDCODED = {repo_name: frozenset(pkg_names) for repo_name, pkg_names in {
+
+    # I found these in this in an old file here:
+    # https://github.com/minimization/content-resolver-input/blob/main/configs/eln-repo-split.yaml
+    # It's a start!
+    "BaseOS": [
+        "attr",
+        "authselect",
+        "autofs",
+        "base-doc",
+        "bash",
+        "bash-completion",
+        "bc",
+        "chrony",
+        "cockpit",
+        "cockpit-bridge",
+        "cockpit-system",
+        "cockpit-ws",
+        "coreutils",
+        "coreutils-common",
+        "coreutils-single",
+        "cpio",
+        "cronie",
+        "curl",
+        "dhcp-client",
+        "dnf",
+        "dracut",
+        "fedora-release-eln",
+        "fedora-repos-eln",
+        "file",
+        "glibc",
+        "grep",
+        "grub2-common",
+        "iptables",
+        "iptables-arptables",
+        "iptables-ebtables",
+        "iptables-utils",
+        "kernel",
+        "kmod",
+        "linux-firmware",
+        "lvm2",
+        "lz4",
+        "lzo",
+        "nftables",
+        "openssh-clients",
+        "openssh-server",
+        "openssl",
+        "passwd",
+        "policycoreutils",
+        "procps-ng",
+        "psmisc",
+        "rpm",
+        "selinux-policy",
+        "selinux-policy-targeted",
+        "strace",
+        "sudo",
+        "systemd",
+        "yum",
+    ],
+
+    # It's the default, so leaving it empty
+    "AppStream" : [],
+
+    # These are packages in CRB in ELN at the time of writing the script
+    # and at the same time explicitly required in workloads
+    "CRB": [
+        "ModemManager",
+        "ModemManager-devel",
+        "ModemManager-glib-devel",
+        "NetworkManager-libnm-devel",
+        "OpenIPMI-devel",
+        "Xaw3d-devel",
+        "accel-config-devel",
+        "asciidoc-doc",
+        "babl-devel",
+        "babl-devel-docs",
+        "bison-devel",
+        "bluez-libs-devel",
+        "boost-b2",
+        "boost-doc",
+        "boost-doctools",
+        "boost-examples",
+        "boost-graph-mpich",
+        "boost-graph-openmpi",
+        "boost-mpich",
+        "boost-mpich-devel",
+        "boost-mpich-python3",
+        "boost-openmpi",
+        "boost-openmpi-devel",
+        "boost-openmpi-python3",
+        "boost-static",
+        "cryptsetup-devel",
+        "cups-filters-devel",
+        "daxctl-devel",
+        "devhelp",
+        "device-mapper-devel",
+        "device-mapper-event-devel",
+        "docbook-style-dsssl",
+        "docbook-utils",
+        "docbook5-schemas",
+        "dovecot",
+        "dovecot-devel",
+        "doxygen",
+        "doxygen-latex",
+        "dyninst-devel",
+        "dyninst-doc",
+        "dyninst-testsuite",
+        "eigen3-devel",
+        "evolution-devel",
+        "flatpak",
+        "freeipmi-devel",
+        "fuse-devel",
+        "gcc-plugin-devel",
+        "gdbm-devel",
+        "ghostscript",
+        "ghostscript-tools-fonts",
+        "ghostscript-tools-printing",
+        "glib2-static",
+        "glibc-nss-devel",
+        "glibc-static",
+        "graphviz-devel",
+        "graphviz-gd",
+        "gvfs",
+        "help2man",
+        "http-parser-devel",
+        "imath-devel",
+        "jasper-devel",
+        "java-11-openjdk-demo-fastdebug",
+        "java-11-openjdk-demo-slowdebug",
+        "java-11-openjdk-devel-fastdebug",
+        "java-11-openjdk-devel-slowdebug",
+        "java-11-openjdk-fastdebug",
+        "java-11-openjdk-headless-fastdebug",
+        "java-11-openjdk-headless-slowdebug",
+        "java-11-openjdk-jmods-fastdebug",
+        "java-11-openjdk-jmods-slowdebug",
+        "java-11-openjdk-slowdebug",
+        "java-11-openjdk-src-fastdebug",
+        "java-11-openjdk-src-slowdebug",
+        "java-11-openjdk-static-libs-fastdebug",
+        "java-11-openjdk-static-libs-slowdebug",
+        "kernel-cross-headers",
+        "kernel-tools-libs-devel",
+        "ksc",
+        "latex2html",
+        "libbabeltrace-devel",
+        "libburn-devel",
+        "libdnf-devel",
+        "libfabric-devel",
+        "libgphoto2-devel",
+        "libgs-devel",
+        "libica-devel",
+        "libisoburn-devel",
+        "libisofs-devel",
+        "libjose-devel",
+        "libknet1",
+        "libknet1-devel",
+        "libluksmeta-devel",
+        "libmad",
+        "libmaxminddb-devel",
+        "libnfsidmap-devel",
+        "libocxl-devel",
+        "libpwquality-devel",
+        "librabbitmq-devel",
+        "librados-devel",
+        "librbd-devel",
+        "librdkafka-devel",
+        "libreoffice-sdk",
+        "libreoffice-sdk-doc",
+        "librtas-devel",
+        "librx",
+        "librx-devel",
+        "libsemanage-devel",
+        "libsepol-static",
+        "libservicelog-devel",
+        "libsndfile-devel",
+        "libstdc++-static",
+        "libtirpc-devel",
+        "libvpd-devel",
+        "linuxdoc-tools",
+        "lvm2-devel",
+        "mariadb-connector-c-test",
+        "mariadb-devel",
+        "mariadb-embedded-devel",
+        "mariadb-test",
+        "memkind-devel",
+        "mpich",
+        "nautilus",
+        "ndctl-devel",
+        "netpbm-devel",
+        "netpbm-doc",
+        "opencryptoki-devel",
+        "opencsd-devel",
+        "openexr-devel",
+        "openjade",
+        "opensm-devel",
+        "opensp",
+        "opensp-devel",
+        "papi-testsuite",
+        "perl-SGMLSpm",
+        "perl-Test-NoWarnings",
+        "perl-Unicode-EastAsianWidth",
+        "ppp",
+        "ppp-devel",
+        "python3",
+        "python3-mpich",
+        "python3-openmpi",
+        "python3-tkinter",
+        "python3-wcwidth",
+        "qatlib-devel",
+        "qclib-devel",
+        "qt5-qtbase-static",
+        "qt5-qtdeclarative-static",
+        "qt5-qttools-static",
+        "rpcsvc-proto-devel",
+        "rubygem-diff-lcs",
+        "rubygem-rspec",
+        "rubygem-rspec-core",
+        "rubygem-rspec-expectations",
+        "rubygem-rspec-mocks",
+        "rubygem-rspec-support",
+        "rubygem-thread_order",
+        "s390utils-devel",
+        "sblim-cmpi-devel",
+        "sblim-sfcc-devel",
+        "sendmail-milter",
+        "sendmail-milter-devel",
+        "shim-unsigned-x64",
+        "spice-protocol",
+        "swig",
+        "swig-doc",
+        "swig-gdb",
+        "tcl",
+        "tesseract-devel",
+        "texi2html",
+        "texinfo",
+        "texinfo-tex",
+        "texlive-lib-devel",
+        "tk",
+        "tog-pegasus-devel",
+        "tpm2-abrmd-devel",
+        "tpm2-tss-devel",
+        "tss2-devel",
+        "unixODBC-devel",
+        "urw-base35-fonts-devel",
+        "uuid-devel",
+        "volume_key-devel",
+        "xmltoman",
+        "zlib-static",
+    ],
+
+    # all in this repo in ELN at the time of writing this script
+    "HA": [
+        "booth",
+        "booth-arbitrator",
+        "booth-core",
+        "booth-site",
+        "booth-test",
+        "corosync",
+        "corosync-qdevice",
+        "corosync-qnetd",
+        "corosynclib",
+        "corosynclib-devel",
+        "fence-agents-aliyun",
+        "fence-agents-all",
+        "fence-agents-amt-ws",
+        "fence-agents-apc",
+        "fence-agents-apc-snmp",
+        "fence-agents-aws",
+        "fence-agents-azure-arm",
+        "fence-agents-bladecenter",
+        "fence-agents-brocade",
+        "fence-agents-cisco-mds",
+        "fence-agents-cisco-ucs",
+        "fence-agents-drac5",
+        "fence-agents-eaton-snmp",
+        "fence-agents-emerson",
+        "fence-agents-eps",
+        "fence-agents-gce",
+        "fence-agents-heuristics-ping",
+        "fence-agents-hpblade",
+        "fence-agents-ibmblade",
+        "fence-agents-ifmib",
+        "fence-agents-ilo-moonshot",
+        "fence-agents-ilo-mp",
+        "fence-agents-ilo-ssh",
+        "fence-agents-ilo2",
+        "fence-agents-intelmodular",
+        "fence-agents-ipdu",
+        "fence-agents-ipmilan",
+        "fence-agents-kdump",
+        "fence-agents-lpar",
+        "fence-agents-mpath",
+        "fence-agents-openstack",
+        "fence-agents-redfish",
+        "fence-agents-rhevm",
+        "fence-agents-rsa",
+        "fence-agents-rsb",
+        "fence-agents-sbd",
+        "fence-agents-scsi",
+        "fence-agents-vmware-rest",
+        "fence-agents-vmware-soap",
+        "fence-agents-wti",
+        "fence-agents-zvm",
+        "ha-cloud-support",
+        "libknet1",
+        "libknet1-compress-bzip2-plugin",
+        "libknet1-compress-lz4-plugin",
+        "libknet1-compress-lzma-plugin",
+        "libknet1-compress-lzo2-plugin",
+        "libknet1-compress-plugins-all",
+        "libknet1-compress-zlib-plugin",
+        "libknet1-compress-zstd-plugin",
+        "libknet1-crypto-nss-plugin",
+        "libknet1-crypto-openssl-plugin",
+        "libknet1-crypto-plugins-all",
+        "libknet1-plugins-all",
+        "libnozzle1",
+        "libqb-devel",
+        "libtool-ltdl-devel",
+        "openwsman-python3",
+        "pacemaker",
+        "pacemaker-cli",
+        "pacemaker-cluster-libs",
+        "pacemaker-cts",
+        "pacemaker-doc",
+        "pacemaker-libs",
+        "pacemaker-libs-devel",
+        "pacemaker-nagios-plugins-metadata",
+        "pacemaker-remote",
+        "pacemaker-schemas",
+        "pcs",
+        "pcs-snmp",
+        "resource-agents",
+        "resource-agents-cloud",
+        "resource-agents-paf",
+        "sbd",
+        "spausedd",
+    ],
+
+    # all in this repo in ELN at the time of writing this script
+    "RT": [
+        "kernel-rt",
+        "kernel-rt-core",
+        "kernel-rt-debug",
+        "kernel-rt-debug-core",
+        "kernel-rt-debug-devel",
+        "kernel-rt-debug-modules",
+        "kernel-rt-debug-modules-extra",
+        "kernel-rt-devel",
+        "kernel-rt-modules",
+        "kernel-rt-modules-extra",
+        "realtime-setup",
+        "rteval",
+        "rteval-loads",
+        "tuned-profiles-realtime",
+    ],
+
+    # all in this repo in ELN at the time of writing this script
+    "NFV": [
+        "kernel-rt",
+        "kernel-rt-core",
+        "kernel-rt-debug",
+        "kernel-rt-debug-core",
+        "kernel-rt-debug-devel",
+        "kernel-rt-debug-kvm",
+        "kernel-rt-debug-modules",
+        "kernel-rt-debug-modules-extra",
+        "kernel-rt-devel",
+        "kernel-rt-kvm",
+        "kernel-rt-modules",
+        "kernel-rt-modules-extra",
+        "realtime-setup",
+        "rteval",
+        "rteval-loads",
+        "tuned-profiles-nfv",
+        "tuned-profiles-nfv-guest",
+        "tuned-profiles-nfv-host",
+        "tuned-profiles-realtime",
+    ],
+
+    # all in this repo in ELN at the time of writing this script
+    "SAP": [
+        "compat-locales-sap",
+        "compat-locales-sap-common",
+        "resource-agents-sap",
+        "sap-cluster-connector",
+        "tuned-profiles-sap",
+        "vhostmd",
+        "vm-dump-metrics",
+    ],
+
+    # all in this repo in ELN at the time of writing this script
+    "SAPHANA": [
+        "resource-agents-sap-hana",
+        "resource-agents-sap-hana-scaleout",
+        "rhel-system-roles-sap",
+        "tuned-profiles-sap-hana",
+        "vhostmd",
+        "vm-dump-metrics",
+    ]
+}.items()}
+
+
 
 
 #   "pcre2-10.40-1.eln120.1": {
@@ -100,896 +589,605 @@ def load_settings():
 #   },
 
 
-###############################################################################
-### Main ######################################################################
-###############################################################################
+def sort_arch(arch, arch_pkgs_data, arch_pkgs_requires, arch_srpm_to_pkgs, arch_repos):
+    # Sorts all packages of a single arch into its repos.
+    # Arches don't depend on each other, so each of them
+    # can be done in a separate process.
 
+    # Do the sorting based on what people want
 
-def main():
-    settings = load_settings()
+    if DEBUG:
+        print("  {}: Doing the sorting based on what people want...".format(arch))
 
-    log("Loading data...")
+    # First the packages themselves, not the deps
+    for pkg_name, pkg_data in arch_pkgs_data.items():
 
-    downloaded_pkg_data = json.loads(requests.get("https://tiny.distro.builders/view-packages--view-eln.json").text)
+        # Runtime package processing
+        if pkg_data.level_number == 0:
+            if "BaseOS" in pkg_data.user_repo_wishes:
+                arch_repos["BaseOS"].add(pkg_name)
 
-    log("Done!")
-    log("")
+        # Buildroot package processing
+        else:
+            if "CRB" in pkg_data.user_repo_wishes:
+                arch_repos["CRB"].add(pkg_name)
 
-    # Turn NVRs into names, because that's all I need for the repo split
+    # And now the deps
+    # Only the requires of packages that have just been added
+    # need to be looked at, so walk them from there.
 
-    log("Making names out of NVRs...")
+    # Runtime package processing
+    pkgs_to_check = deque(arch_repos["BaseOS"])
+    while pkgs_to_check:
+        pkg_name = pkgs_to_check.popleft()
 
-    pkgs_data = {}
-    #
-    # pkgs_data[arch][pkg_name]...
-    #
-    for arch in settings["allowed_arches"]:
-        pkgs_data[arch] = {}
+        for dep_name in arch_pkgs_requires.get(pkg_name, ()):
+            if dep_name in arch_repos["BaseOS"]:
+                continue
+
+            if arch_pkgs_data[dep_name].level_number != 0:
+                continue
+
+            arch_repos["BaseOS"].add(dep_name)
+            pkgs_to_check.append(dep_name)
 
-        for pkg_id, pkg_data in downloaded_pkg_data["pkgs"].items():
-            pkg_name = pkg_id_to_name(pkg_id)
+    # Buildroot package processing
+    pkgs_to_check = deque(arch_repos["CRB"])
+    while pkgs_to_check:
+        pkg_name = pkgs_to_check.popleft()
 
-            if arch not in pkg_data["arches_arches"]:
+        for dep_name in arch_pkgs_requires.get(pkg_name, ()):
+            if dep_name in arch_repos["CRB"]:
                 continue
 
-            if "placeholder" in pkg_data["arches_arches"][arch]:
-                if len(pkg_data["arches_arches"][arch]) == 1:
-                    continue
-                
-                non_placeholder_arches = set()
-                for rpm_arch in pkg_data["arches_arches"][arch]:
-                    if rpm_arch == "placeholder":
-                        continue
-                    non_placeholder_arches.add(rpm_arch)
-                
-                pkg_data["arches_arches"][arch] = list(non_placeholder_arches)
+            if arch_pkgs_data[dep_name].level_number == 0:
+                continue
 
-                del non_placeholder_arches
+            arch_repos["CRB"].add(dep_name)
+            pkgs_to_check.append(dep_name)
 
-            # Init 
-            if pkg_name not in pkgs_data[arch]:
-                pkgs_data[arch][pkg_name] = {}
-
-                # Stuff from Content Resolver
-                pkgs_data[arch][pkg_name]["name"] = pkg_name
-                pkgs_data[arch][pkg_name]["source_name"] = pkg_data["source_name"]
-                pkgs_data[arch][pkg_name]["rpm_arches"] = pkg_data["arches_arches"][arch]
-                pkgs_data[arch][pkg_name]["required_in_workloads"] = False
-                pkgs_data[arch][pkg_name]["required_by"] = set()
-                pkgs_data[arch][pkg_name]["level_number"] = pkg_data["level_number"]
-
-                # Users can wish for any package to be in any repo.
-                # All this algorighm cares about is the repos, it doesn't
-                # need to know who wanted what.
-                pkgs_data[arch][pkg_name]["user_repo_wishes"] = set()
 
-            
-            # Dependencies
-            for dep_id in pkg_data["hard_dependency_of_pkg_nevrs"]:
-                dep_name = pkg_id_to_name(dep_id)
-                pkgs_data[arch][pkg_name]["required_by"].add(dep_name)
+    # Default placement:
+    # - everything that's runtime (Environment, Required, Dependency) goes to AppStream
+    # - everything that's build (Base Buildroot, Buildroot level N) goes to buildroot-only
 
-            # Required in a workload?
-            if pkg_data["in_workload_conf_ids_req"]:
-                pkgs_data[arch][pkg_name]["required_in_workloads"] = True
+    if DEBUG:
+        print("  {}: Put everything else in its default place...".format(arch))
 
-            # Level number - runtime or buildroot
-            # Keep the lower level number (so runtime gets priority before build)
-            # Levels:
-            #   0 - runtime
-            #   1 and higher - buildroot
-            #
-            if pkg_data["level_number"] < pkgs_data[arch][pkg_name]["level_number"]:
-                pkgs_data[arch][pkg_name]["level_number"] = pkg_data["level_number"]
-        
-    log("  Original NVRs: {}".format(len(downloaded_pkg_data["pkgs"])))
-    log("  Names:")
-    for arch, pkgs in pkgs_data.items():
-        log("    {}:    {}".format(arch, len(pkgs)))
-    log("Done!")
-    log("")
+    # See what's already in a repo
+    pkgs_in_repos = set()
+    for repo_name, repo_pkgs in arch_repos.items():
+        pkgs_in_repos.update(repo_pkgs)
+    
+    for pkg_name, pkg_data in arch_pkgs_data.items():
 
+        # Skip everything that's already in a repo
+        if pkg_name in pkgs_in_repos:
+            continue
 
-    # Initiate the repos
+        # Runtime package processing
+        if pkg_data.level_number == 0:
+            arch_repos["AppStream"].add(pkg_name)
 
-    log("Initiating repos...")
+        # Buildroot package processing
+        else:
+            arch_repos["buildroot-only"].add(pkg_name)
 
-    repos = {}
-    #
-    # repos[arch][repo_name]...
-    #
-    for arch in settings["allowed_arches"]:
-        repos[arch] = {}
 
-        for repo_name, repo_arches in settings["repos"].items():
-            if arch not in repo_arches:
-                continue
+    # Separate CRB
+    # Yep, some workloads are meant to be in CRB. So let's just do that.
+    # Pull out everything that's marked as CRB, unless it can't be pulled out because something else requires it.
+    # And then pull out everything that's only needed by CRB packages.
 
-            repos[arch][repo_name] = set()
+    if DEBUG:
+        print("  {}: Pulling out CRB...".format(arch))
 
-    log("Done!")
-    log("")
+    # Put all packages the users want in CRB here
+    crb_packages = set()
 
+    for pkg_name in arch_repos["AppStream"]:
+        pkg_data = arch_pkgs_data[pkg_name]
+        
+        if "CRB" in pkg_data.user_repo_wishes:
+            crb_packages.add(pkg_name)
+    
+    # Validate it's possible. That means packages in
+    # 'crb_packages' can only be required by packages
+    # in 'crb_packages'. If that's not the case,
+    # take them out.
+    crb_packages_impossible = set()
 
-    # Record wishes
-    #
-    # This adds repo names into pkgs_data[arch][pkg_name]["user_repo_wishes"]
+    for pkg_name in crb_packages:
+        pkg_data = arch_pkgs_data[pkg_name]
+
+        if not crb_packages.issuperset(pkg_data.required_by):
+            crb_packages_impossible.add(pkg_name)
+    
+    crb_packages.difference_update(crb_packages_impossible)
+
+    # Whatever these require can't be in CRB either,
+    # and so on, all the way down.
+    pkgs_to_check = deque(crb_packages_impossible)
+    while pkgs_to_check:
+        pkg_name = pkgs_to_check.popleft()
+
+        impossible_deps = crb_packages.intersection(arch_pkgs_requires.get(pkg_name, ()))
+
+        crb_packages.difference_update(impossible_deps)
+        pkgs_to_check.extend(impossible_deps)
+    
+    arch_repos["AppStream"].difference_update(crb_packages)
+    arch_repos["CRB"] |= crb_packages
+
+    # Add dependencies that are only needed for CRB
+    # However, don't move "required" packages here,
+    # because the default behavior for these is to be in AppStream.
     #
+    # Everything in AppStream gets checked once, and after that
+    # only the requires of packages that have just been pulled out.
 
-    log("Recording people's wishes...")
-
-    wishes_hardcoded = {
-
-        # I found these in this in an old file here:
-        # https://github.com/minimization/content-resolver-input/blob/main/configs/eln-repo-split.yaml
-        # It's a start!
-        "BaseOS": [
-            "attr",
-            "authselect",
-            "autofs",
-            "base-doc",
-            "bash",
-            "bash-completion",
-            "bc",
-            "chrony",
-            "cockpit",
-            "cockpit-bridge",
-            "cockpit-system",
-            "cockpit-ws",
-            "coreutils",
-            "coreutils-common",
-            "coreutils-single",
-            "cpio",
-            "cronie",
-            "curl",
-            "dhcp-client",
-            "dnf",
-            "dracut",
-            "fedora-release-eln",
-            "fedora-repos-eln",
-            "file",
-            "glibc",
-            "grep",
-            "grub2-common",
-            "iptables",
-            "iptables-arptables",
-            "iptables-ebtables",
-            "iptables-utils",
-            "kernel",
-            "kmod",
-            "linux-firmware",
-            "lvm2",
-            "lz4",
-            "lzo",
-            "nftables",
-            "openssh-clients",
-            "openssh-server",
-            "openssl",
-            "passwd",
-            "policycoreutils",
-            "procps-ng",
-            "psmisc",
-            "rpm",
-            "selinux-policy",
-            "selinux-policy-targeted",
-            "strace",
-            "sudo",
-            "systemd",
-            "yum",
-        ],
-
-        # It's the default, so leaving it empty
-        "AppStream" : [],
-
-        # These are packages in CRB in ELN at the time of writing the script
-        # and at the same time explicitly required in workloads
-        "CRB": [
-            "ModemManager",
-            "ModemManager-devel",
-            "ModemManager-glib-devel",
-            "NetworkManager-libnm-devel",
-            "OpenIPMI-devel",
-            "Xaw3d-devel",
-            "accel-config-devel",
-            "asciidoc-doc",
-            "babl-devel",
-            "babl-devel-docs",
-            "bison-devel",
-            "bluez-libs-devel",
-            "boost-b2",
-            "boost-doc",
-            "boost-doctools",
-            "boost-examples",
-            "boost-graph-mpich",
-            "boost-graph-openmpi",
-            "boost-mpich",
-            "boost-mpich-devel",
-            "boost-mpich-python3",
-            "boost-openmpi",
-            "boost-openmpi-devel",
-            "boost-openmpi-python3",
-            "boost-static",
-            "cryptsetup-devel",
-            "cups-filters-devel",
-            "daxctl-devel",
-            "devhelp",
-            "device-mapper-devel",
-            "device-mapper-event-devel",
-            "docbook-style-dsssl",
-            "docbook-utils",
-            "docbook5-schemas",
-            "dovecot",
-            "dovecot-devel",
-            "doxygen",
-            "doxygen-latex",
-            "dyninst-devel",
-            "dyninst-doc",
-            "dyninst-testsuite",
-            "eigen3-devel",
-            "evolution-devel",
-            "flatpak",
-            "freeipmi-devel",
-            "fuse-devel",
-            "gcc-plugin-devel",
-            "gdbm-devel",
-            "ghostscript",
-            "ghostscript-tools-fonts",
-            "ghostscript-tools-printing",
-            "glib2-static",
-            "glibc-nss-devel",
-            "glibc-static",
-            "graphviz-devel",
-            "graphviz-gd",
-            "gvfs",
-            "help2man",
-            "http-parser-devel",
-            "imath-devel",
-            "jasper-devel",
-            "java-11-openjdk-demo-fastdebug",
-            "java-11-openjdk-demo-slowdebug",
-            "java-11-openjdk-devel-fastdebug",
-            "java-11-openjdk-devel-slowdebug",
-            "java-11-openjdk-fastdebug",
-            "java-11-openjdk-headless-fastdebug",
-            "java-11-openjdk-headless-slowdebug",
-            "java-11-openjdk-jmods-fastdebug",
-            "java-11-openjdk-jmods-slowdebug",
-            "java-11-openjdk-slowdebug",
-            "java-11-openjdk-src-fastdebug",
-            "java-11-openjdk-src-slowdebug",
-            "java-11-openjdk-static-libs-fastdebug",
-            "java-11-openjdk-static-libs-slowdebug",
-            "kernel-cross-headers",
-            "kernel-tools-libs-devel",
-            "ksc",
-            "latex2html",
-            "libbabeltrace-devel",
-            "libburn-devel",
-            "libdnf-devel",
-            "libfabric-devel",
-            "libgphoto2-devel",
-            "libgs-devel",
-            "libica-devel",
-            "libisoburn-devel",
-            "libisofs-devel",
-            "libjose-devel",
-            "libknet1",
-            "libknet1-devel",
-            "libluksmeta-devel",
-            "libmad",
-            "libmaxminddb-devel",
-            "libnfsidmap-devel",
-            "libocxl-devel",
-            "libpwquality-devel",
-            "librabbitmq-devel",
-            "librados-devel",
-            "librbd-devel",
-            "librdkafka-devel",
-            "libreoffice-sdk",
-            "libreoffice-sdk-doc",
-            "librtas-devel",
-            "librx",
-            "librx-devel",
-            "libsemanage-devel",
-            "libsepol-static",
-            "libservicelog-devel",
-            "libsndfile-devel",
-            "libstdc++-static",
-            "libtirpc-devel",
-            "libvpd-devel",
-            "linuxdoc-tools",
-            "lvm2-devel",
-            "mariadb-connector-c-test",
-            "mariadb-devel",
-            "mariadb-embedded-devel",
-            "mariadb-test",
-            "memkind-devel",
-            "mpich",
-            "nautilus",
-            "ndctl-devel",
-            "netpbm-devel",
-            "netpbm-doc",
-            "opencryptoki-devel",
-            "opencsd-devel",
-            "openexr-devel",
-            "openjade",
-            "opensm-devel",
-            "opensp",
-            "opensp-devel",
-            "papi-testsuite",
-            "perl-SGMLSpm",
-            "perl-Test-NoWarnings",
-            "perl-Unicode-EastAsianWidth",
-            "ppp",
-            "ppp-devel",
-            "python3",
-            "python3-mpich",
-            "python3-openmpi",
-            "python3-tkinter",
-            "python3-wcwidth",
-            "qatlib-devel",
-            "qclib-devel",
-            "qt5-qtbase-static",
-            "qt5-qtdeclarative-static",
-            "qt5-qttools-static",
-            "rpcsvc-proto-devel",
-            "rubygem-diff-lcs",
-            "rubygem-rspec",
-            "rubygem-rspec-core",
-            "rubygem-rspec-expectations",
-            "rubygem-rspec-mocks",
-            "rubygem-rspec-support",
-            "rubygem-thread_order",
-            "s390utils-devel",
-            "sblim-cmpi-devel",
-            "sblim-sfcc-devel",
-            "sendmail-milter",
-            "sendmail-milter-devel",
-            "shim-unsigned-x64",
-            "spice-protocol",
-            "swig",
-            "swig-doc",
-            "swig-gdb",
-            "tcl",
-            "tesseract-devel",
-            "texi2html",
-            "texinfo",
-            "texinfo-tex",
-            "texlive-lib-devel",
-            "tk",
-            "tog-pegasus-devel",
-            "tpm2-abrmd-devel",
-            "tpm2-tss-devel",
-            "tss2-devel",
-            "unixODBC-devel",
-            "urw-base35-fonts-devel",
-            "uuid-devel",
-            "volume_key-devel",
-            "xmltoman",
-            "zlib-static",
-        ],
-
-        # all in this repo in ELN at the time of writing this script
-        "HA": [
-            "booth",
-            "booth-arbitrator",
-            "booth-core",
-            "booth-site",
-            "booth-test",
-            "corosync",
-            "corosync-qdevice",
-            "corosync-qnetd",
-            "corosynclib",
-            "corosynclib-devel",
-            "fence-agents-aliyun",
-            "fence-agents-all",
-            "fence-agents-amt-ws",
-            "fence-agents-apc",
-            "fence-agents-apc-snmp",
-            "fence-agents-aws",
-            "fence-agents-azure-arm",
-            "fence-agents-bladecenter",
-            "fence-agents-brocade",
-            "fence-agents-cisco-mds",
-            "fence-agents-cisco-ucs",
-            "fence-agents-drac5",
-            "fence-agents-eaton-snmp",
-            "fence-agents-emerson",
-            "fence-agents-eps",
-            "fence-agents-gce",
-            "fence-agents-heuristics-ping",
-            "fence-agents-hpblade",
-            "fence-agents-ibmblade",
-            "fence-agents-ifmib",
-            "fence-agents-ilo-moonshot",
-            "fence-agents-ilo-mp",
-            "fence-agents-ilo-ssh",
-            "fence-agents-ilo2",
-            "fence-agents-intelmodular",
-            "fence-agents-ipdu",
-            "fence-agents-ipmilan",
-            "fence-agents-kdump",
-            "fence-agents-lpar",
-            "fence-agents-mpath",
-            "fence-agents-openstack",
-            "fence-agents-redfish",
-            "fence-agents-rhevm",
-            "fence-agents-rsa",
-            "fence-agents-rsb",
-            "fence-agents-sbd",
-            "fence-agents-scsi",
-            "fence-agents-vmware-rest",
-            "fence-agents-vmware-soap",
-            "fence-agents-wti",
-            "fence-agents-zvm",
-            "ha-cloud-support",
-            "libknet1",
-            "libknet1-compress-bzip2-plugin",
-            "libknet1-compress-lz4-plugin",
-            "libknet1-compress-lzma-plugin",
-            "libknet1-compress-lzo2-plugin",
-            "libknet1-compress-plugins-all",
-            "libknet1-compress-zlib-plugin",
-            "libknet1-compress-zstd-plugin",
-            "libknet1-crypto-nss-plugin",
-            "libknet1-crypto-openssl-plugin",
-            "libknet1-crypto-plugins-all",
-            "libknet1-plugins-all",
-            "libnozzle1",
-            "libqb-devel",
-            "libtool-ltdl-devel",
-            "openwsman-python3",
-            "pacemaker",
-            "pacemaker-cli",
-            "pacemaker-cluster-libs",
-            "pacemaker-cts",
-            "pacemaker-doc",
-            "pacemaker-libs",
-            "pacemaker-libs-devel",
-            "pacemaker-nagios-plugins-metadata",
-            "pacemaker-remote",
-            "pacemaker-schemas",
-            "pcs",
-            "pcs-snmp",
-            "resource-agents",
-            "resource-agents-cloud",
-            "resource-agents-paf",
-            "sbd",
-            "spausedd",
-        ],
-
-        # all in this repo in ELN at the time of writing this script
-        "RT": [
-            "kernel-rt",
-            "kernel-rt-core",
-            "kernel-rt-debug",
-            "kernel-rt-debug-core",
-            "kernel-rt-debug-devel",
-            "kernel-rt-debug-modules",
-            "kernel-rt-debug-modules-extra",
-            "kernel-rt-devel",
-            "kernel-rt-modules",
-            "kernel-rt-modules-extra",
-            "realtime-setup",
-            "rteval",
-            "rteval-loads",
-            "tuned-profiles-realtime",
-        ],
-
-        # all in this repo in ELN at the time of writing this script
-        "NFV": [
-            "kernel-rt",
-            "kernel-rt-core",
-            "kernel-rt-debug",
-            "kernel-rt-debug-core",
-            "kernel-rt-debug-devel",
-            "kernel-rt-debug-kvm",
-            "kernel-rt-debug-modules",
-            "kernel-rt-debug-modules-extra",
-            "kernel-rt-devel",
-            "kernel-rt-kvm",
-            "kernel-rt-modules",
-            "kernel-rt-modules-extra",
-            "realtime-setup",
-            "rteval",
-            "rteval-loads",
-            "tuned-profiles-nfv",
-            "tuned-profiles-nfv-guest",
-            "tuned-profiles-nfv-host",
-            "tuned-profiles-realtime",
-        ],
-
-        # all in this repo in ELN at the time of writing this script
-        "SAP": [
-            "compat-locales-sap",
-            "compat-locales-sap-common",
-            "resource-agents-sap",
-            "sap-cluster-connector",
-            "tuned-profiles-sap",
-            "vhostmd",
-            "vm-dump-metrics",
-        ],
-
-        # all in this repo in ELN at the time of writing this script
-        "SAPHANA": [
-            "resource-agents-sap-hana",
-            "resource-agents-sap-hana-scaleout",
-            "rhel-system-roles-sap",
-            "tuned-profiles-sap-hana",
-            "vhostmd",
-            "vm-dump-metrics",
-        ]
-    }
+    pkgs_to_check = deque(arch_repos["AppStream"])
+    while pkgs_to_check:
+        pkg_name = pkgs_to_check.popleft()
 
-    for arch, pkg_names in pkgs_data.items():
-        for pkg_name in pkg_names:
-            for wish_repo_name, wish_pkg_names in wishes_hardcoded.items():
+        if pkg_name not in arch_repos["AppStream"]:
+            continue
 
-                if pkg_name not in wish_pkg_names:
-                    continue
+        pkg_data = arch_pkgs_data[pkg_name]
 
-                if wish_repo_name not in settings["repos"]:
-                    log("ERROR: {}: {} repo is unknown".format(pkg_name, wish_repo_name))
-                    continue
+        if pkg_data.required_in_workloads:
+            continue
 
-                if arch not in settings["repos"][wish_repo_name]:
-                    log("ERROR: {}: {} repo doesn't have {}".format(pkg_name, wish_repo_name, arch))
-                    continue
+        # Only a candidate if nothing in AppStream requires it
+        if arch_repos["AppStream"].isdisjoint(pkg_data.required_by):
+            arch_repos["AppStream"].remove(pkg_name)
+            arch_repos["CRB"].add(pkg_name)
+            pkgs_to_check.extend(arch_pkgs_requires.get(pkg_name, ()))
 
-                pkgs_data[arch][pkg_name]["user_repo_wishes"].add(wish_repo_name)
-                log("  {} - {} - {}".format(arch, pkg_name, pkgs_data[arch][pkg_name]["user_repo_wishes"]))
 
-    log("Done!")
-    log("")
+    # Moving packages from buildroot-only to CRB if any other package from
+    # the same SRPM is in BaseOS, AppStream, or CRB
 
+    if DEBUG:
+        print("  {}: Moving packages from buildroot-only to CRB...".format(arch))
 
-    # Do the sorting based on what people want
+    shipped_srpm_names = set()
+    rpms_to_move = set()
 
-    log("Doing the sorting based on what people want...")
+    # Get all the shipped SRPM names
+    for repo in ["AppStream", "BaseOS", "CRB"]:
+        repo_pkgs = arch_repos[repo]
 
-    for arch, arch_pkgs_data in pkgs_data.items():
-        log("  {}...".format(arch))
+        for pkg_name in repo_pkgs:
+            srpm_name = arch_pkgs_data[pkg_name].source_name
+            shipped_srpm_names.add(srpm_name)
 
-        # First the packages themselves, not the deps
-        for pkg_name, pkg_data in arch_pkgs_data.items():
+    # And find RPMs of those SRPMs in buildroot-only
+    for srpm_name in shipped_srpm_names:
+        for pkg_name in arch_srpm_to_pkgs[srpm_name]:
+            if pkg_name in arch_repos["buildroot-only"]:
+                rpms_to_move.add(pkg_name)
 
-            # Runtime package processing
-            if pkg_data["level_number"] == 0:
-                if "BaseOS" in pkg_data["user_repo_wishes"]:
-                    repos[arch]["BaseOS"].add(pkg_name)
+    # Move them
+    for pkg_name in rpms_to_move:
+        arch_repos["CRB"].add(pkg_name)
+        arch_repos["buildroot-only"].remove(pkg_name)
 
-            # Buildroot package processing
-            else:
-                if "CRB" in pkg_data["user_repo_wishes"]:
-                    repos[arch]["CRB"].add(pkg_name)
-
-        # And now the deps
-        moved_deps = set()
-        while True:
-
-            moved_deps_len = len(moved_deps)
-
-            for pkg_name, pkg_data in arch_pkgs_data.items():
-
-                # Runtime package processing
-                if pkg_data["level_number"] == 0:
-                    for required_by in pkg_data["required_by"]:
-                        if required_by in repos[arch]["BaseOS"]:
-                            repos[arch]["BaseOS"].add(pkg_name)
-                            moved_deps.add(pkg_name)
-
-                # Buildroot package processing
-                else:
-                    for required_by in pkg_data["required_by"]:
-                        if required_by in repos[arch]["CRB"]:
-                            repos[arch]["CRB"].add(pkg_name)
-                            moved_deps.add(pkg_name)
-
-            # If no more packages have been moved, stop
-            if moved_deps_len == len(moved_deps):
-                break
-    
-        del moved_deps
-        del moved_deps_len
+    # Move the deps
+    # Start with what's directly required by something in CRB,
+    # and then only follow the requires of what's been moved.
+    pkgs_to_check = deque()
 
-    log("Done!")
-    log("")
+    for pkg_name in arch_repos["buildroot-only"]:
+        if not arch_repos["CRB"].isdisjoint(arch_pkgs_data[pkg_name].required_by):
+            pkgs_to_check.append(pkg_name)
 
+    arch_repos["buildroot-only"].difference_update(pkgs_to_check)
+    arch_repos["CRB"].update(pkgs_to_check)
 
-    # Default placement:
-    # - everything that's runtime (Environment, Required, Dependency) goes to AppStream
-    # - everything that's build (Base Buildroot, Buildroot level N) goes to buildroot-only
+    while pkgs_to_check:
+        pkg_name = pkgs_to_check.popleft()
 
-    log("Put everything else in its default place")
+        moved_deps = arch_repos["buildroot-only"].intersection(arch_pkgs_requires.get(pkg_name, ()))
 
-    for arch, arch_repos in repos.items():
-        log("  {}...".format(arch))
+        arch_repos["buildroot-only"].difference_update(moved_deps)
+        arch_repos["CRB"].update(moved_deps)
+        pkgs_to_check.extend(moved_deps)
 
-        # See what's already in a repo
-        pkgs_in_repos = set()
-        for repo_name, repo_pkgs in arch_repos.items():
-            pkgs_in_repos.update(repo_pkgs)
-        
-        for pkg_name, pkg_data in pkgs_data[arch].items():
+    return arch_repos
 
-            # Skip everything that's already in a repo
-            if pkg_name in pkgs_in_repos:
-                continue
 
-            # Runtime package processing
-            if pkg_data["level_number"] == 0:
-                repos[arch]["AppStream"].add(pkg_name)
+###############################################################################
+### Main ######################################################################
+###############################################################################
 
-            # Buildroot package processing
-            else:
-                repos[arch]["buildroot-only"].add(pkg_name)
-        
-        del pkgs_in_repos
 
-    log("Done!")
-    log("")
+def main():
+    settings = load_settings()
 
+    if DEBUG:
+        print("Loading data...")
 
-    # Separate CRB
-    # Yep, some workloads are meant to be in CRB. So let's just do that.
-    # Pull out everything that's marked as CRB, unless it can't be pulled out because something else requires it.
-    # And then pull out everything that's only needed by CRB packages.
+    # The feed is big, so it's parsed as a stream below, one package at a time,
+    # instead of loading the whole thing into memory first.
+    pkg_data_file = open_pkg_data("https://tiny.distro.builders/view-packages--view-eln.json")
 
-    log("Pulling out CRB")
+    if DEBUG:
+        print("Done!")
+        print("")
 
-    for arch, arch_repos in repos.items():
-        log("  {}...".format(arch))
+    # Turn NVRs into names, because that's all I need for the repo split
 
-        # Put all packages the users want in CRB here
-        crb_packages = set()
+    if DEBUG:
+        print("Making names out of NVRs...")
 
-        for pkg_name in repos[arch]["AppStream"]:
-            pkg_data = pkgs_data[arch][pkg_name]
-            
-            if "CRB" in pkg_data["user_repo_wishes"]:
-                crb_packages.add(pkg_name)
-        
-        # Validate it's possible. That means packages in
-        # 'crb_packages' can only be required by packages
-        # in 'crb_packages'. If that's not the case,
-        # take them out.
-        crb_packages_impossible = set()
+    pkgs_data = {}
+    #
+    # pkgs_data[arch][pkg_name]...
+    #
+    for arch in settings["allowed_arches"]:
+        pkgs_data[arch] = {}
+
+    # The same dependencies as in "required_by", just the other way around,
+    # so it's cheap to see what a package pulls in when it's moved somewhere.
+    pkgs_requires = {}
+    #
+    # pkgs_requires[arch][pkg_name] = set(pkg_names it requires)
+    #
+    for arch in settings["allowed_arches"]:
+        pkgs_requires[arch] = {}
 
-        while True:
+    srpm_to_pkgs = {}
+    #
+    # srpm_to_pkgs[arch][srpm_name] = [pkg_names]
+    #
+    for arch in settings["allowed_arches"]:
+        srpm_to_pkgs[arch] = {}
 
-            crb_packages_impossible_len = len(crb_packages_impossible)
+    allowed_arches = set(settings["allowed_arches"])
 
-            for pkg_name in crb_packages:
-                pkg_data = pkgs_data[arch][pkg_name]
+    # The same NVRs come up over and over again as dependencies,
+    # so each of them only gets turned into a name once.
+    # The names are interned, as every one of them ends up in many sets.
+    name_by_id = {}
 
-                for required_by in pkg_data["required_by"]:
-                    if required_by not in crb_packages:
-                        crb_packages_impossible.add(pkg_name)
-                
-                del pkg_data
-            
-            crb_packages = crb_packages - crb_packages_impossible
-            
-            # If no more changes, end the while loop
-            if crb_packages_impossible_len == len(crb_packages_impossible):
-                break
-        
-        del crb_packages_impossible
-        
-        repos[arch]["AppStream"] = repos[arch]["AppStream"] - crb_packages
-        repos[arch]["CRB"].update(crb_packages)
+    original_nvrs_count = 0
 
-        # Add dependencies that are only needed for CRB
-        # However, don't move "required" packages here,
-        # because the default behavior for these is to be in AppStream.
+    # Each package is visited just once, and only for the arches it's actually in
+    for pkg_id, pkg_data in ijson.kvitems(pkg_data_file, "pkgs"):
+        original_nvrs_count += 1
 
-        while True:
+        if pkg_id not in name_by_id:
+            name_by_id[pkg_id] = sys.intern(pkg_id_to_name(pkg_id))
+        pkg_name = name_by_id[pkg_id]
+        srpm_name = sys.intern(pkg_data["source_name"])
 
-            crb_packages_len = len(crb_packages)
-        
-            for pkg_name in repos[arch]["AppStream"]:
-                pkg_data = pkgs_data[arch][pkg_name]
+        # These are the same on all arches
+        dep_names = set()
+        for dep_id in pkg_data["hard_dependency_of_pkg_nevrs"]:
+            if dep_id not in name_by_id:
+                name_by_id[dep_id] = sys.intern(pkg_id_to_name(dep_id))
+            dep_names.add(name_by_id[dep_id])
+
+        for arch, rpm_arches in pkg_data["arches_arches"].items():
+
+            if arch not in allowed_arches:
+                continue
+
+            if "placeholder" in rpm_arches:
+                rpm_arches = [rpm_arch for rpm_arch in rpm_arches if rpm_arch != "placeholder"]
 
-                if pkg_data["required_in_workloads"]:
+                if not rpm_arches:
                     continue
 
-                crb_candidate = True
+            arch_pkgs_data = pkgs_data[arch]
+            arch_pkgs_requires = pkgs_requires[arch]
 
-                for required_by in pkg_data["required_by"]:
-                    if required_by in repos[arch]["AppStream"]:
-                        crb_candidate = False
-                
-                if crb_candidate:
-                    crb_packages.add(pkg_name)
-                
-                del crb_candidate
-                del pkg_data
+            # Init 
+            if pkg_name not in arch_pkgs_data:
+                entry = PkgEntry(pkg_name, srpm_name, rpm_arches, pkg_data["level_number"])
+                arch_pkgs_data[pkg_name] = entry
+
+                if srpm_name not in srpm_to_pkgs[arch]:
+                    srpm_to_pkgs[arch][srpm_name] = []
+                srpm_to_pkgs[arch][srpm_name].append(pkg_name)
+
+            else:
+                entry = arch_pkgs_data[pkg_name]
+
+            # Dependencies
+            entry.required_by.update(dep_names)
+
+            for dep_name in dep_names:
+                if dep_name not in arch_pkgs_requires:
+                    arch_pkgs_requires[dep_name] = set()
+                arch_pkgs_requires[dep_name].add(pkg_name)
+
+            # Required in a workload?
+            if pkg_data["in_workload_conf_ids_req"]:
+                entry.required_in_workloads = True
+
+            # Level number - runtime or buildroot
+            # Keep the lower level number (so runtime gets priority before build)
+            # Levels:
+            #   0 - runtime
+            #   1 and higher - buildroot
+            #
+            if pkg_data["level_number"] < entry.level_number:
+                entry.level_number = pkg_data["level_number"]
 
-            repos[arch]["AppStream"] = repos[arch]["AppStream"] - crb_packages
-            repos[arch]["CRB"].update(crb_packages)
+    pkg_data_file.close()
 
-            # If nothing else has been pulled out, end the while loop
-            if crb_packages_len == len(crb_packages):
-                break
+    # Nothing gets added to these anymore, and they're only ever iterated over
+    for arch_pkgs_data in pkgs_data.values():
+        for pkg_data in arch_pkgs_data.values():
+            pkg_data.required_by = tuple(pkg_data.required_by)
         
-        del crb_packages
-        del crb_packages_len
+    if DEBUG:
+        print("  Original NVRs: {}".format(original_nvrs_count))
+        print("  Names:")
+        for arch, pkgs in pkgs_data.items():
+            print("    {}:    {}".format(arch, len(pkgs)))
+        print("Done!")
+        print("")
 
-    log("Done!")
-    log("")
-    
 
-    # Moving packages from buildroot-only to CRB if any other package from
-    # the same SRPM is in BaseOS, AppStream, or CRB
+    # Initiate the repos
 
-    log("Moving packages from buildroot-only to CRB...")
+    if DEBUG:
+        print("Initiating repos...")
 
-    for arch, arch_pkgs_data in pkgs_data.items():
-        log("  {}...".format(arch))
+    repos = {}
+    #
+    # repos[arch][repo_name]...
+    #
+    for arch in settings["allowed_arches"]:
+        repos[arch] = {}
 
-        shipped_srpm_names = set()
-        rpms_to_move = set()
+        for repo_name, repo_arches in settings["repos"].items():
+            if arch not in repo_arches:
+                continue
 
-        # Get all the shipped SRPM names
-        for repo in ["AppStream", "BaseOS", "CRB"]:
-            repo_pkgs = repos[arch][repo]
+            repos[arch][repo_name] = set()
 
-            for pkg_name in repo_pkgs:
-                srpm_name = pkgs_data[arch][pkg_name]["source_name"]
-                shipped_srpm_names.add(srpm_name)
-        
-        del repo_pkgs
+    if DEBUG:
+        print("Done!")
+        print("")
 
-        # And find RPMs of those SRPMs in buildroot-only
-        for pkg_name in repos[arch]["buildroot-only"]:
-            srpm_name = pkgs_data[arch][pkg_name]["source_name"]
 
-            if srpm_name in shipped_srpm_names:
-                rpms_to_move.add(pkg_name)
+    # Record wishes
+    #
+    # This adds repo names into pkgs_data[arch][pkg_name].user_repo_wishes
+    #
+
+    if DEBUG:
+        print("Recording people's wishes...")
+
+    # Work out which wishes can be granted on which arch up front,
+    # so each package needs just a single lookup
+    wished_repos_for_arch = {}
+    #
+    # wished_repos_for_arch[arch][pkg_name] = frozenset(repo_names)
+    #
+    for arch in settings["allowed_arches"]:
+        arch_wishes = {}
 
-        del shipped_srpm_names
-        del srpm_name
+        for wish_repo_name, wish_pkg_names in WISHES_HARDCODED.items():
 
-        # Move them
-        for pkg_name in rpms_to_move:
-            repos[arch]["CRB"].add(pkg_name)
-            repos[arch]["buildroot-only"].remove(pkg_name)
+            if wish_repo_name not in settings["repos"]:
+                if DEBUG:
+                    print("ERROR: {} repo is unknown".format(wish_repo_name))
+                continue
 
-        del rpms_to_move
+            if arch not in settings["repos"][wish_repo_name]:
+                if DEBUG:
+                    print("ERROR: {} repo doesn't have {}".format(wish_repo_name, arch))
+                continue
 
-        # Move the deps
-        moved_deps = set()
-        while True:
+            for wish_pkg_name in wish_pkg_names:
+                if wish_pkg_name not in arch_wishes:
+                    arch_wishes[wish_pkg_name] = set()
+                arch_wishes[wish_pkg_name].add(wish_repo_name)
 
-            moved_deps_len = len(moved_deps)
+        wished_repos_for_arch[arch] = {}
+        for wish_pkg_name, wish_repo_names in arch_wishes.items():
+            wished_repos_for_arch[arch][wish_pkg_name] = frozenset(wish_repo_names)
 
-            for pkg_name, pkg_data in arch_pkgs_data.items():
+    for arch, arch_pkgs_data in pkgs_data.items():
+        arch_wishes = wished_repos_for_arch[arch]
 
-                if pkg_name not in repos[arch]["buildroot-only"]:
-                    continue
+        for pkg_name, pkg_data in arch_pkgs_data.items():
+            wished_repos = arch_wishes.get(pkg_name)
 
-                for required_by in pkg_data["required_by"]:
-                    if required_by in repos[arch]["CRB"]:
-                        repos[arch]["CRB"].add(pkg_name)
-                        repos[arch]["buildroot-only"].discard(pkg_name)
-                        moved_deps.add(pkg_name)
+            if wished_repos:
+                pkg_data.user_repo_wishes.update(wished_repos)
+                if DEBUG:
+                    print("  {} - {} - {}".format(arch, pkg_name, pkg_data.user_repo_wishes))
 
-            if moved_deps_len == len(moved_deps):
-                break
+    if DEBUG:
+        print("Done!")
+        print("")
 
-        del moved_deps_len
-        del moved_deps
 
-    log("Done!")
-    log("")
+    # Sort everything into repos, all arches at the same time
+
+    if DEBUG:
+        print("Sorting packages into repos...")
+
+    arches = list(pkgs_data)
+
+    with ProcessPoolExecutor(max_workers=len(arches)) as executor:
+        sorted_repos = executor.map(
+            sort_arch,
+            arches,
+            [pkgs_data[arch] for arch in arches],
+            [pkgs_requires[arch] for arch in arches],
+            [srpm_to_pkgs[arch] for arch in arches],
+            [repos[arch] for arch in arches]
+        )
+
+        for arch, arch_repos in zip(arches, sorted_repos):
+            repos[arch] = arch_repos
+
+    if DEBUG:
+        print("Done!")
+        print("")
 
 
     # Addons
 
-    log("Separating addons (HA, NFV, RS, RT, SAP, SAPHANA)")
+    if DEBUG:
+        print("Separating addons (HA, NFV, RS, RT, SAP, SAPHANA)")
 
     for arch, arch_pkgs_data in pkgs_data.items():
-        log("  {}...".format(arch))
+        if DEBUG:
+            print("  {}...".format(arch))
+
+        arch_repos = repos[arch]
+        appstream = arch_repos["AppStream"]
+        arch_pkgs_requires = pkgs_requires[arch]
+
+        # Addons only ever get split out of AppStream
+        if not appstream:
+            if DEBUG:
+                print("    skipped (no AppStream)")
+            continue
 
         removed_addon_pkgs = set()
 
-        for pkg_name, pkg_data in arch_pkgs_data.items():
+        # Only wished packages can go to an addon, so there's
+        # no need to go through all the other ones
+        for pkg_name in wished_repos_for_arch[arch]:
 
             # I only want to deal with AppStream packages here
-            if pkg_name not in repos[arch]["AppStream"]:
+            if pkg_name not in appstream:
                 continue
 
-            for repo_wish in pkg_data["user_repo_wishes"]:
-                if repo_wish in settings["addon_repos"]:
+            pkg_data = arch_pkgs_data[pkg_name]
 
-                    repos[arch][repo_wish].add(pkg_name)
+            addon_wishes = pkg_data.user_repo_wishes & settings["addon_repos"]
+            if not addon_wishes:
+                continue
 
-                    # If it's in BaseOS, something requires it, so it can't be removed
-                    if pkg_name in repos[arch]["BaseOS"]:
-                        continue
-                    
-                    repos[arch]["AppStream"].discard(pkg_name)
-                    removed_addon_pkgs.add(pkg_name)
+            for repo_wish in addon_wishes:
+                arch_repos[repo_wish].add(pkg_name)
+
+            # If it's in BaseOS, something requires it, so it can't be removed
+            if pkg_name in arch_repos["BaseOS"]:
+                continue
+            
+            appstream.discard(pkg_name)
+            removed_addon_pkgs.add(pkg_name)
 
         
         # If they're needed in the main repos,
-        # add them back to the main repos
-        returned_addon_pkgs = set()
-        while True:
-            returned_addon_pkgs_len = len(returned_addon_pkgs)
-
-            for pkg_name in removed_addon_pkgs:
-                pkg_data = pkgs_data[arch][pkg_name]
-
-                for required_by in pkg_data["required_by"]:
-                    if required_by in repos[arch]["AppStream"]:
-                        repos[arch]["AppStream"].add(pkg_name)
-                        returned_addon_pkgs.add(pkg_name)
-            
-            if returned_addon_pkgs_len == len(returned_addon_pkgs):
-                break
+        # add them back to the main repos.
+        # First those directly required by something in AppStream,
+        # and then whatever those require, and so on.
+        returned_addon_pkgs = {
+            pkg_name for pkg_name in removed_addon_pkgs
+            if not appstream.isdisjoint(arch_pkgs_data[pkg_name].required_by)
+        }
+        pkgs_to_check = deque(returned_addon_pkgs)
+
+        appstream.update(returned_addon_pkgs)
 
-        del removed_addon_pkgs
-        del returned_addon_pkgs
-        del returned_addon_pkgs_len
-        del pkg_data
+        while pkgs_to_check:
+            pkg_name = pkgs_to_check.popleft()
 
-    log("Done!")
-    log("")
+            # Only the removed ones that haven't been returned yet
+            returned_deps = removed_addon_pkgs.intersection(arch_pkgs_requires.get(pkg_name, ()))
+            returned_deps.difference_update(returned_addon_pkgs)
+
+            appstream.update(returned_deps)
+            returned_addon_pkgs.update(returned_deps)
+            pkgs_to_check.extend(returned_deps)
+
+    if DEBUG:
+        print("Done!")
+        print("")
 
 
     # Printing
 
-    log("")
-    log("Wheeeeeeeee!")
-    log("")
+    if DEBUG:
+        print("")
+        print("Wheeeeeeeee!")
+        print("")
 
     all_pkgs = set()
 
-    for arch, arch_repos in repos.items():
-        log(arch)
-        for repo, repo_pkgs in arch_repos.items():
-            log("  {}:  {}".format(repo, len(repo_pkgs)))
-        log("")
+    if DEBUG:
+        for arch, arch_repos in repos.items():
+            print(arch)
+            for repo, repo_pkgs in arch_repos.items():
+                print("  {}:  {}".format(repo, len(repo_pkgs)))
+            print("")
 
     
 
 
     # Print the prepopulate.json
+    #
+    # It gets printed one repo at a time, so there's never more
+    # than a single repo's worth of it in memory at once.
 
-    prepopulate_json = {}
+    sys.stdout.flush()
+    output = sys.stdout.buffer
 
-    for arch, arch_repos in repos.items():
+    # Several repos could end up in the same real one,
+    # so they need to be printed together
+    repo_names_by_real_name = {}
+    for repo_name in settings["repos"]:
 
-        for repo_name, repo_pkgs in arch_repos.items():
-            
-            if repo_name == "buildroot-only":
-                continue
+        if repo_name == "buildroot-only":
+            continue
+
+        repo_names_by_real_name.setdefault(real_repo_name(repo_name), []).append(repo_name)
+
+    output.write(b"{")
+    prepopulate_repo_count = 0
+
+    for prepopulate_repo_name, repo_names in repo_names_by_real_name.items():
+
+        prepopulate_repo = {}
+
+        for arch, arch_repos in repos.items():
+            arch_pkgs_data = pkgs_data[arch]
+
+            for repo_name in repo_names:
+
+                if repo_name not in arch_repos:
+                    continue
+
+                prepopulate_arch = prepopulate_repo.setdefault(arch, {})
                 
-            if real_repo_name(repo_name) not in prepopulate_json:
-                prepopulate_json[real_repo_name(repo_name)] = {}
-            
-            if arch not in prepopulate_json[real_repo_name(repo_name)]:
-                prepopulate_json[real_repo_name(repo_name)][arch] = {}
-            
-            for pkg_name in repo_pkgs:
-                pkg_data = pkgs_data[arch][pkg_name]
-                srpm_name = pkg_data["source_name"]
+                for pkg_name in arch_repos[repo_name]:
+                    pkg_data = arch_pkgs_data[pkg_name]
+                    srpm_name = pkg_data.source_name
+                    rpm_arches = pkg_data.rpm_arches
 
-                rpm_arches = pkg_data["rpm_arches"]
+                    srpm_pkgs = prepopulate_arch.setdefault(srpm_name, [])
 
-                if srpm_name not in prepopulate_json[real_repo_name(repo_name)][arch]:
-                    prepopulate_json[real_repo_name(repo_name)][arch][srpm_name] = []
+                    srpm_pkgs.extend([pkg_name + "." + rpm_arch for rpm_arch in rpm_arches])
 
-                for rpm_arch in rpm_arches:
-                    pkg_name_dot_arch = "{name}.{rpm_arch}".format(
-                        name=pkg_name,
-                        rpm_arch=rpm_arch
-                    )
-                    prepopulate_json[real_repo_name(repo_name)][arch][srpm_name].append(pkg_name_dot_arch)
+        if not prepopulate_repo:
+            continue
 
-    
-    print(json.dumps(prepopulate_json, indent=4))
+        if prepopulate_repo_count:
+            output.write(b",")
+        prepopulate_repo_count += 1
+
+        # Nested one level deeper than it'd be on its own
+        prepopulate_repo_json = orjson.dumps(prepopulate_repo, option=orjson.OPT_INDENT_2)
+        prepopulate_repo_json = prepopulate_repo_json.replace(b"\n", b"\n  ")
+
+        output.write(b"\n  " + orjson.dumps(prepopulate_repo_name) + b": " + prepopulate_repo_json)
+
+    if prepopulate_repo_count:
+        output.write(b"\n")
+    output.write(b"}\n")
+    output.flush()
 
 
 
@@ -9,7 +9,8 @@
 # For more information on the license, see LICENSE.
 # For more information on free software, see <https://www.gnu.org/philosophy/free-sw.en.html>.
 
-import dnf, json, subprocess, tempfile, argparse, jinja2
+import dnf, json, subprocess, tempfile, argparse, jinja2, heapq, sys
+from concurrent.futures import ProcessPoolExecutor
 
 
 # === Data Structures ===
@@ -116,47 +117,40 @@ def log(msg):
 
 
 def _create_packages_structure(installed, query):
+    # All installed packages, only queried once and then
+    # just filtered for each package below
+    installed_query = query.installed()
+
     # Make it into a list of my Package structures
+    #
+    # The same names show up in the dependency lists of many packages,
+    # so they get interned to be just one string each. That saves memory,
+    # makes the graph lookups cheaper, and makes the structure smaller
+    # when it's pickled to be sent between processes.
     packages = {}
     for pkg in installed:
-        package = {}
-        package["name"] = pkg.name
-        package["epoch"] = pkg.epoch
-        package["version"] = pkg.version
-        package["release"] = pkg.release
-        package["arch"] = pkg.arch
-        package["nevra"] = str(pkg)
-        package["size"] = pkg.installsize
-        package["requires"] = []
-        package["requires_resolved"] = []
-        package["recommends"] = []
-        package["recommends_resolved"] = []
-        package["suggests"] = []
-        package["suggests_resolved"] = []
-
-        for req in pkg.requires:
-            package["requires"].append(str(req))
-
-        for req in pkg.recommends:
-            package["recommends"].append(str(req))
-
-        for req in pkg.suggests:
-            package["suggests"].append(str(req))
-
-        deps = query.installed()
-        deps = deps.filter(provides=pkg.requires)
-        for dep in deps:
-            package["requires_resolved"].append(dep.name)
-
-        deps = query.installed()
-        deps = deps.filter(provides=pkg.recommends)
-        for dep in deps:
-            package["recommends_resolved"].append(dep.name)
-
-        deps = query.installed()
-        deps = deps.filter(provides=pkg.suggests)
-        for dep in deps:
-            package["suggests_resolved"].append(dep.name)
+        # Every access to these builds a new list of reldeps,
+        # so each of them only gets read once
+        requires = pkg.requires
+        recommends = pkg.recommends
+        suggests = pkg.suggests
+
+        # Built as a single dict display rather than key by key
+        package = {
+            "name": sys.intern(pkg.name),
+            "epoch": pkg.epoch,
+            "version": pkg.version,
+            "release": pkg.release,
+            "arch": pkg.arch,
+            "nevra": str(pkg),
+            "size": pkg.installsize,
+            "requires": [str(req) for req in requires],
+            "requires_resolved": [sys.intern(dep.name) for dep in installed_query.filter(provides=requires)],
+            "recommends": [str(req) for req in recommends],
+            "recommends_resolved": [sys.intern(dep.name) for dep in installed_query.filter(provides=recommends)],
+            "suggests": [str(req) for req in suggests],
+            "suggests_resolved": [sys.intern(dep.name) for dep in installed_query.filter(provides=suggests)],
+        }
 
         packages[package["name"]] = package
 
@@ -179,9 +173,6 @@ def load_packages_from_path(root="/", releasever=None):
 
 def load_packages_from_container_image(image):
     base = dnf.Base()
-    
-    data = subprocess.check_output(['podman', 'inspect', image])
-    #size_bytes = json.loads(data)[0]["Size"]
 
     # Extract DNF and RPM data
     with tempfile.TemporaryDirectory() as tmp:
@@ -203,7 +194,12 @@ def compute_graph(packages, groups=None):
 
     graph = {}
 
-    for _, package in packages.items():
+    # Packages of each group get looked up for every package,
+    # so make them into sets just once
+    if groups:
+        groups_pkgs = [frozenset(group["packages"]) for group in groups]
+
+    for package in packages.values():
         node = {}
         name = package["name"]
 
@@ -211,8 +207,8 @@ def compute_graph(packages, groups=None):
         # and 'package' is in any of those,
         # add those groups to the graph instead of the package.
         if groups:
-            for group in groups:
-                if name in group["packages"]:
+            for group, group_pkgs in zip(groups, groups_pkgs):
+                if name in group_pkgs:
                     node["name"] = group["name"]
                     node["size"] = group["size"]
                     node["type"] = "group"
@@ -237,9 +233,7 @@ def compute_graph(packages, groups=None):
                 pkg_deps_recommends = set(package["recommends_resolved"])
                 pkg_deps_suggests = set(package["suggests_resolved"])
 
-                for group in groups:
-                    group_pkgs = set(group["packages"])
-
+                for group, group_pkgs in zip(groups, groups_pkgs):
                     requires_in_group = pkg_deps_requires & group_pkgs
                     recommends_in_group = pkg_deps_recommends & group_pkgs
                     suggests_in_group = pkg_deps_suggests & group_pkgs
@@ -291,7 +285,7 @@ def graph_to_dot(graph, sizes=False, highlights=None):
     dot = 'digraph packages {\n'
 
     # Formatting
-    for _, node in graph.items():
+    for node in graph.values():
 
         formatting = ['shape=none']
 
@@ -313,14 +307,14 @@ def graph_to_dot(graph, sizes=False, highlights=None):
             dot += '"{node}" [{formatting}];\n'.format(node=node["name"], formatting=",".join(formatting))
 
     # Hard dependencies
-    for _, node in graph.items():
+    for node in graph.values():
         dot += '"{node}" -> {{\n'.format(node=node["name"])
         for dep in node["dependencies"]:
             dot += '    "{dep}"\n'.format(dep=dep)
         dot += "};\n"
 
     # Weak dependencies
-    for _, node in graph.items():
+    for node in graph.values():
         dot += '"{node}" -> {{\n'.format(node=node["name"])
         for dep in node["weak_dependencies"]:
             dot += '    "{dep}"\n'.format(dep=dep)
@@ -337,7 +331,7 @@ def graph_to_package_list(graph, sizes=False):
     groups = []
     packages = []
     
-    for _, node in graph.items():
+    for node in graph.values():
 
         if node["type"] == "group":
             if sizes:
@@ -373,26 +367,15 @@ def packages_to_group(name, packages):
     suggests = set()
     suggests_resolved = set()
 
-    for _, package in packages.items():
+    for package in packages.values():
         group_packages.add(package["name"])
 
-        for req in package["requires"]:
-            requires.add(req)
-
-        for req_pkg in package["requires_resolved"]:
-            requires_resolved.add(req_pkg)
-
-        for req in package["recommends"]:
-            recommends.add(req)
-
-        for req_pkg in package["recommends_resolved"]:
-            recommends_resolved.add(req_pkg)
-
-        for req in package["suggests"]:
-            suggests.add(req)
-
-        for req_pkg in package["suggests_resolved"]:
-            suggests_resolved.add(req_pkg)
+        requires.update(package["requires"])
+        requires_resolved.update(package["requires_resolved"])
+        recommends.update(package["recommends"])
+        recommends_resolved.update(package["recommends_resolved"])
+        suggests.update(package["suggests"])
+        suggests_resolved.update(package["suggests_resolved"])
 
         group["size"] += package["size"]
 
@@ -495,7 +478,8 @@ document.addEventListener('click', function(e) {
 ]]></script>
 """
 
-    return svg.split("</svg>")[0] + javascript + "\n</svg>\n"
+    # Everything before the closing tag, without splitting the whole svg into a list
+    return svg.partition("</svg>")[0] + javascript + "\n</svg>\n"
 
 
 
@@ -507,14 +491,12 @@ def dot_to_graph_svg(dot):
 
     stage1 = subprocess.run(["sfdp", "-Gstart=3", "-Goverlap=prism"], capture_output=True, input=dot, encoding="UTF-8")
 
-    log("    running gvmap...")
-
-    stage2 = subprocess.run(["gvmap", "-e", "-d", "3"], capture_output=True, input=stage1.stdout, encoding="UTF-8")
-    stage2 = stage1
+    # The gvmap stage (["gvmap", "-e", "-d", "3"]) is skipped,
+    # its output wasn't used anyway.
 
     log("    running neato...")
 
-    stage3 = subprocess.run(["neato", "-Gstart=3", "-n", "-Ecolor=#44444455", "-Tsvg", "-Gdpi=60"], capture_output=True, input=stage2.stdout, encoding="UTF-8")
+    stage3 = subprocess.run(["neato", "-Gstart=3", "-n", "-Ecolor=#44444455", "-Tsvg", "-Gdpi=60"], capture_output=True, input=stage1.stdout, encoding="UTF-8")
 
     svg = str(stage3.stdout)
 
@@ -625,6 +607,33 @@ def get_packages(name):
     return packages
 
 
+def load_installation_for_report(install_name, install_what, base_pkg_set, groups=None, sizes=False):
+    # Loads one of the additional installations of a report.
+    # These don't depend on each other, so each of them
+    # can be loaded in a separate process.
+    packages = get_packages(install_what)
+
+    graph = compute_graph(packages, groups)
+
+    pkg_list = graph_to_package_list(graph, sizes=sizes)
+
+    pkg_set = set(pkg_list)
+    pkgs_in_base = sorted(pkg_set & base_pkg_set)
+    pkgs_not_in_base = sorted(pkg_set - base_pkg_set)
+
+    this_size = sum(pkg["size"] for pkg in graph.values())
+
+    image = {
+        "name" : install_name,
+        "size" : size(this_size),
+        "pkgs_in_base": pkgs_in_base,
+        "pkgs_not_in_base": pkgs_not_in_base,
+        "packages": pkg_list
+        }
+
+    return image
+
+
 def generate_report(base_packages, base_name=None, additional_installations=None):
     if not base_name:
         base_name = "Base installation"
@@ -663,14 +672,25 @@ def main():
 
     args = parser.parse_args()
 
-    packages = get_packages(args.what)
+    # The installation itself and the group containers don't depend
+    # on each other, so they all get loaded at the same time
+    group_containers = args.group_container or []
+
+    with ProcessPoolExecutor(max_workers=1 + len(group_containers)) as executor:
+        packages_future = executor.submit(get_packages, args.what)
+
+        grp_pkgs_futures = []
+        for container in group_containers:
+            grp_pkgs_futures.append(executor.submit(load_packages_from_container_image, container[1]))
+
+        packages = packages_future.result()
 
     if args.group_container:
         groups = []
 
-        for container in args.group_container:
+        for container, grp_pkgs_future in zip(args.group_container, grp_pkgs_futures):
             grp_name = container[0]
-            grp_pkgs = load_packages_from_container_image(container[1])
+            grp_pkgs = grp_pkgs_future.result()
 
             group = packages_to_group(grp_name, grp_pkgs)
 
@@ -695,9 +715,7 @@ def main():
         output = "\n".join(pkg_list)
 
     if args.how == "size":
-        base_size = 0
-        for _, pkg in graph.items():
-            base_size += pkg["size"]
+        base_size = sum(pkg["size"] for pkg in graph.values())
 
         output = size(base_size)
 
@@ -705,9 +723,7 @@ def main():
 
         base_pkg_list = graph_to_package_list(graph, sizes=args.sizes)
 
-        base_size = 0
-        for _, pkg in graph.items():
-            base_size += pkg["size"]
+        base_size = sum(pkg["size"] for pkg in graph.values())
 
         base_name = "Base installation"
         if args.name:
@@ -721,55 +737,49 @@ def main():
 
         images = []
         if args.add:
-            for installation in args.add:
-
-                install_name = installation[0]
-                install_what = installation[1]
+            if not args.group_container:
+                groups = None
 
-                packages = get_packages(install_what)
+            # Every installation gets compared to the base one
+            base_pkg_set = frozenset(base_pkg_list)
 
-                if args.group_container:
-                    graph = compute_graph(packages, groups)
-                else:
-                    graph = compute_graph(packages)
+            # Load all the other installations at the same time
+            with ProcessPoolExecutor(max_workers=len(args.add)) as executor:
+                futures = []
+                for installation in args.add:
 
-                pkg_list = graph_to_package_list(graph, sizes=args.sizes)
+                    install_name = installation[0]
+                    install_what = installation[1]
 
-                pkgs_in_base = list(set(base_pkg_list) & set(pkg_list))
-                pkgs_not_in_base = list(set(pkg_list) - set(pkgs_in_base))
-                pkgs_in_base.sort()
-                pkgs_not_in_base.sort()
+                    futures.append(executor.submit(load_installation_for_report, install_name, install_what, base_pkg_set, groups, args.sizes))
 
-                this_size = 0
-                for _, pkg in graph.items():
-                    this_size += pkg["size"]
+                for future in futures:
+                    images.append(future.result())
 
-                image = {
-                    "name" : install_name,
-                    "size" : size(this_size),
-                    "pkgs_in_base": pkgs_in_base,
-                    "pkgs_not_in_base": pkgs_not_in_base,
-                    "packages": pkg_list
-                    }
-                images.append(image)
 
-
-        extra_pkgs = []
-        for image in images:
-            extra_pkgs += image["pkgs_not_in_base"]
-        extra_pkgs = list(set(extra_pkgs))
-        extra_pkgs.sort()
+        # Each "pkgs_not_in_base" is already sorted, so merging them
+        # and dropping the duplicates keeps the result sorted
+        extra_pkgs = list(dict.fromkeys(heapq.merge(*[image["pkgs_not_in_base"] for image in images])))
 
 
+        # The report can get big, so it's streamed into the output
+        # below instead of being rendered into a single string
         template = jinja2.Template(get_template())
-        output = template.render(base=base, images=images, extra_pkgs=extra_pkgs)
+        output = template.stream(base=base, images=images, extra_pkgs=extra_pkgs)
 
 
     if args.where:
         with open(args.where, "w") as outfile:
-            outfile.write(output)
+            if args.how == "report":
+                output.dump(outfile)
+            else:
+                outfile.write(output)
     else:
-        print (output)
+        if args.how == "report":
+            output.dump(sys.stdout)
+            print ()
+        else:
+            print (output)
 
 
 if __name__ == "__main__":
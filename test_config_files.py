@@ -1,6 +1,9 @@
 #!/usr/bin/python3
 
-from content_resolver.config_manager import ConfigManager
+import os
+import shutil
+from content_resolver.config_manager import CONFIGS_CACHE_VERSION, ConfigManager
+from content_resolver.utils import dump_data, load_data
 
 def create_mock_settings():
     settings = {}
@@ -9,7 +12,61 @@ def create_mock_settings():
     settings["allowed_arches"] = ["aarch64","ppc64le","s390x","x86_64"]
 
     return settings
-  
+
+
+def create_cache_settings(tmp_path):
+    # A copy of the test configs, so they can be edited
+    configs_dir = tmp_path / "configs"
+    shutil.copytree("test_configs", configs_dir)
+
+    settings = {}
+    settings["configs"] = str(configs_dir)
+    settings["configs_cache_path"] = str(tmp_path / "configs_cache.json")
+    settings["allowed_arches"] = ["aarch64","ppc64le","s390x","x86_64"]
+
+    return settings
+
+
+def test_configs_cache(tmp_path):
+    settings = create_cache_settings(tmp_path)
+
+    # A second run gets the same configs from the cache
+    configs = ConfigManager(settings).get_configs()
+    cache = load_data(settings["configs_cache_path"])
+    assert cache["version"] == CONFIGS_CACHE_VERSION
+    assert cache["files"]
+    assert ConfigManager(settings).get_configs() == configs
+
+    # An edited file doesn't get its old entry from the cache
+    env_path = os.path.join(settings["configs"], "base-empty.yaml")
+    with open(env_path, "r") as file:
+        env_yaml = file.read()
+    with open(env_path, "w") as file:
+        file.write(env_yaml.replace("name: Empty installroot", "name: Edited installroot"))
+
+    edited_configs = ConfigManager(settings).get_configs()
+    assert edited_configs["envs"]["base-empty"]["name"] == "Edited installroot"
+    assert load_data(settings["configs_cache_path"])["files"][env_path]["hash"] != cache["files"][env_path]["hash"]
+
+
+def test_configs_cache_version(tmp_path):
+    settings = create_cache_settings(tmp_path)
+
+    ConfigManager(settings).get_configs()
+
+    # A cache from a different version is discarded,
+    # even if all the hashes still match
+    cache = load_data(settings["configs_cache_path"])
+    env_path = os.path.join(settings["configs"], "base-empty.yaml")
+    cache["files"][env_path]["document"]["data"]["name"] = "From an old cache"
+    cache["version"] = CONFIGS_CACHE_VERSION - 1
+    dump_data(settings["configs_cache_path"], cache)
+
+    configs = ConfigManager(settings).get_configs()
+    assert configs["envs"]["base-empty"]["name"] == "Empty installroot"
+    assert load_data(settings["configs_cache_path"])["version"] == CONFIGS_CACHE_VERSION
+
+
 def main():
     config_manager = ConfigManager(create_mock_settings())
     config_manager.get_configs()
@@ -1,6 +1,40 @@
 #!/usr/bin/python3
 
+import json
+import multiprocessing
+import sys
+import time
+import pytest
 import content_resolver
+from content_resolver.exceptions import OutputGenerationError
+from content_resolver.utils import dump_data, run_forked
 
 def test_build_completion():
-    assert 1 == 1
\ No newline at end of file
+    assert 1 == 1
+
+def test_dump_data_big_int(tmp_path):
+    # orjson can't serialize integers over 64 bits, but they're valid YAML and JSON
+    path = tmp_path / "data.json"
+    data = {"extra": 123456789012345678901234567890, "pkgs": {"bash"}}
+
+    dump_data(path, data)
+
+    with open(path, "r") as file:
+        assert json.load(file) == {"extra": 123456789012345678901234567890, "pkgs": ["bash"]}
+
+def _fail(query):
+    sys.exit(3)
+
+def _sleep(query):
+    time.sleep(30)
+
+def test_run_forked_failure():
+    # One failing generator stops the whole thing,
+    # and doesn't leave the others running
+    started = time.monotonic()
+
+    with pytest.raises(OutputGenerationError, match="'_fail' failed with exit code 3"):
+        run_forked([_sleep, _fail], None, 2)
+
+    assert time.monotonic() - started < 10
+    assert multiprocessing.active_children() == []
@@ -0,0 +1,130 @@
+#!/usr/bin/python3
+
+import itertools
+import random
+from content_resolver.config_manager import ConfigManager
+from content_resolver.query import Query
+
+ALLOWED_ARCHES = ["aarch64","ppc64le","s390x","x86_64"]
+
+
+def create_mock_query():
+    # The real configs, but made-up results, as the analysis needs DNF
+    settings = {}
+    settings["configs"] = "test_configs"
+    settings["allowed_arches"] = ALLOWED_ARCHES
+
+    configs = ConfigManager(settings).get_configs()
+
+    randomness = random.Random(0)
+
+    data = {}
+    data["workloads"] = {}
+    for workload_conf_id, env_conf_id, repo_id in itertools.product(configs["workloads"], configs["envs"], configs["repos"]):
+        for arch in configs["repos"][repo_id]["source"]["architectures"]:
+            if randomness.random() < 0.5:
+                continue
+
+            workload_id = "{workload_conf_id}:{env_conf_id}:{repo_id}:{arch}".format(
+                workload_conf_id=workload_conf_id,
+                env_conf_id=env_conf_id,
+                repo_id=repo_id,
+                arch=arch
+            )
+            data["workloads"][workload_id] = {
+                "workload_conf_id": workload_conf_id,
+                "env_conf_id": env_conf_id,
+                "repo_id": repo_id,
+                "arch": arch,
+                "labels": configs["workloads"][workload_conf_id]["labels"],
+            }
+
+    data["pkgs"] = {}
+    for repo_id, repo in configs["repos"].items():
+        data["pkgs"][repo_id] = {}
+        for arch in repo["source"]["architectures"]:
+            data["pkgs"][repo_id][arch] = {}
+            for pkg_number in range(30):
+                if randomness.random() < 0.3:
+                    continue
+
+                pkg_name = "pkg{}".format(pkg_number)
+                pkg_id = "{}-1.0-1.{}".format(pkg_name, arch)
+                data["pkgs"][repo_id][arch][pkg_id] = {
+                    "name": pkg_name,
+                    "source_name": "srpm{}".format(pkg_number % 7),
+                }
+
+    return Query(data, configs, settings)
+
+
+def workloads_by_scanning(query, workload_conf_id, env_conf_id, repo_id, arch, list_all=False, output_change=None):
+    # How Query.workloads used to find them, trying every combination of the configs
+    if output_change:
+        list_all = True
+
+    matching_ids = set()
+
+    for one_workload_conf_id in [workload_conf_id] if workload_conf_id else query.configs["workloads"]:
+        for one_env_conf_id in [env_conf_id] if env_conf_id else query.configs["envs"]:
+            for one_repo_id in [repo_id] if repo_id else query.configs["repos"]:
+                for one_arch in [arch] if arch else ALLOWED_ARCHES:
+                    workload_id = "{}:{}:{}:{}".format(one_workload_conf_id, one_env_conf_id, one_repo_id, one_arch)
+                    if workload_id not in query.data["workloads"]:
+                        continue
+                    if not list_all:
+                        return True
+                    matching_ids.add({
+                        "workload_conf_ids": one_workload_conf_id,
+                        "env_conf_ids": one_env_conf_id,
+                        "repo_ids": one_repo_id,
+                        "arches": one_arch,
+                        None: workload_id,
+                    }[output_change])
+
+    if not list_all:
+        return False
+    return sorted(matching_ids)
+
+
+def test_workloads_index():
+    query = create_mock_query()
+
+    for workload_conf_id, env_conf_id, repo_id, arch in itertools.product(
+        [None] + list(query.configs["workloads"]),
+        [None] + list(query.configs["envs"]),
+        [None] + list(query.configs["repos"]),
+        [None] + ALLOWED_ARCHES,
+    ):
+        for list_all, output_change in [(False, None), (True, None), (True, "workload_conf_ids"), (True, "env_conf_ids"), (True, "repo_ids"), (True, "arches")]:
+            expected = workloads_by_scanning(query, workload_conf_id, env_conf_id, repo_id, arch, list_all=list_all, output_change=output_change)
+            assert query.workloads(workload_conf_id, env_conf_id, repo_id, arch, list_all=list_all, output_change=output_change) == expected
+
+
+def test_workloads_in_view_index():
+    query = create_mock_query()
+
+    for view_conf_id, view_conf in query.configs["views"].items():
+        for arch in [None] + query.arches_in_view(view_conf_id):
+            # The workloads of the view's repo and arch, with one of its labels
+            expected = [
+                workload_id for workload_id in workloads_by_scanning(query, None, None, view_conf["repository"], arch, list_all=True)
+                if set(query.data["workloads"][workload_id]["labels"]) & set(view_conf["labels"])
+            ]
+            assert query.workloads_in_view(view_conf_id, arch) == expected
+
+
+def test_srpm_name_to_rpm_names_index():
+    query = create_mock_query()
+
+    for repo_id, pkgs_by_arch in query.data["pkgs"].items():
+        for srpm_number in range(8):
+            srpm_name = "srpm{}".format(srpm_number)
+
+            expected = set()
+            for pkgs in pkgs_by_arch.values():
+                for pkg in pkgs.values():
+                    if pkg["source_name"] == srpm_name:
+                        expected.add(pkg["name"])
+
+            assert query._srpm_name_to_rpm_names(srpm_name, repo_id) == expected